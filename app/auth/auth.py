@@ -2,8 +2,11 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.auth.models.user import User
+from app.core.executor import BoundedExecutor
 import os
+import uuid
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,6 +17,13 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = os.environ.get("SECRET_KEY", "supersecretkey")
 ALGORITHM = os.environ.get("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", 14))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 16))
+
+# bcrypt runs here rather than on the shared threadpool, so a burst of logins
+# cannot starve other routes; excess attempts are refused with 429.
+password_executor = BoundedExecutor(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, name="password")
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -21,17 +31,39 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(User).filter(User.email == email).first()
+async def verify_password_async(plain_password, hashed_password):
+    return await password_executor.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await password_executor.run(get_password_hash, password)
+
+async def authenticate_user(db: Session, email: str, password: str):
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == email).first())
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
-def create_access_token(data: dict, expires_delta: timedelta | None = None):
+def create_access_token(data: dict, expires_delta: timedelta | None = None, token_type: str = "access"):
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"exp": expire, "iat": now, "jti": uuid.uuid4().hex, "type": token_type})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt 
\ No newline at end of file
+    return encoded_jwt
+
+def create_token_pair(email: str, family: str | None = None) -> dict:
+    """
+    Access token plus a rotating refresh token. Both carry the id of the
+    refresh-token family ("fam"), so revoking the family logs out the whole
+    chain that started with one login.
+    """
+    data = {"sub": email, "fam": family or uuid.uuid4().hex}
+    return {
+        "access_token": create_access_token(data),
+        "refresh_token": create_access_token(
+            data, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS), token_type="refresh"
+        ),
+        "token_type": "bearer",
+    } 
\ No newline at end of file
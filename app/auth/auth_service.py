@@ -1,14 +1,71 @@
+from datetime import datetime, timedelta
 from fastapi import HTTPException
+from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from app.auth.auth import authenticate_user, create_access_token
+import os
+from app.auth.auth import (
+    ALGORITHM,
+    REFRESH_TOKEN_EXPIRE_DAYS,
+    SECRET_KEY,
+    authenticate_user,
+    create_token_pair,
+)
+from app.auth.revocation import revocations
+from app.core.ratelimit import TokenBucketLimiter
+
+# Token buckets in front of password verification: LOGIN_*_PER_MINUTE sets
+# the refill rate and LOGIN_*_BURST how many attempts may come at once.
+login_ip_limiter = TokenBucketLimiter(
+    rate=float(os.environ.get("LOGIN_IP_PER_MINUTE", 30)) / 60,
+    burst=float(os.environ.get("LOGIN_IP_BURST", 10)),
+)
+login_email_limiter = TokenBucketLimiter(
+    rate=float(os.environ.get("LOGIN_EMAIL_PER_MINUTE", 5)) / 60,
+    burst=float(os.environ.get("LOGIN_EMAIL_BURST", 5)),
+)
 
 class AuthService:
     @staticmethod
-    def login(db: Session, email: str, password: str) -> dict:
+    async def login(db: Session, email: str, password: str, client_ip: str = "") -> dict:
         if not email.endswith("@l4it.net"):
             raise HTTPException(status_code=400, detail="Email must end with @l4it.net")
-        user = authenticate_user(db, email, password)
+        login_ip_limiter.check(client_ip, "Too many login attempts from this address, please try again later.")
+        login_email_limiter.check(email.lower(), "Too many login attempts for this account, please try again later.")
+        user = await authenticate_user(db, email, password)
         if not user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
-        access_token = create_access_token(data={"sub": user.email})
-        return {"access_token": access_token, "token_type": "bearer"} 
\ No newline at end of file
+        return create_token_pair(user.email)
+
+    @staticmethod
+    def refresh(db: Session, refresh_token: str) -> dict:
+        """
+        Exchange a refresh token for a new token pair. The presented token is
+        revoked, so each refresh token works once; presenting one again means
+        it was stolen or replayed, and the whole family is revoked. Both
+        checks go to the database rather than the per-process Bloom filter,
+        so a replay is caught even by a worker that has not synced yet, and
+        of two concurrent refreshes with one token only the first wins.
+        """
+        invalid = HTTPException(status_code=401, detail="Invalid refresh token")
+        try:
+            payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise invalid
+        if payload.get("type") != "refresh" or not payload.get("sub") or not payload.get("jti"):
+            raise invalid
+        family = payload.get("fam")
+        expires_at = datetime.utcfromtimestamp(payload["exp"])
+        if revocations.is_revoked_in_db(db, family):
+            raise invalid
+        if not revocations.revoke(db, payload["jti"], expires_at):
+            revocations.revoke(db, family, datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+            raise invalid
+        return create_token_pair(payload["sub"], family)
+
+    @staticmethod
+    def logout(db: Session, payload: dict) -> None:
+        """Revoke the presented access token and its refresh-token family."""
+        revocations.revoke(db, payload.get("jti"), datetime.utcfromtimestamp(payload["exp"]))
+        revocations.revoke(
+            db, payload.get("fam"), datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        ) 
\ No newline at end of file
@@ -2,7 +2,9 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from app.auth.models.user import User
-from app.core.database import SessionLocal
+from app.auth.principal import Principal, principal_cache
+from app.auth.revocation import revocations
+from app.core.database import get_db
 from sqlalchemy.orm import Session
 import os
 
@@ -10,15 +12,11 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "supersecretkey")
 ALGORITHM = os.environ.get("ALGORITHM", "HS256")
+# Comma-separated emails allowed to use /internal endpoints; when empty nobody is.
+ADMIN_EMAILS = {e.strip().lower() for e in os.environ.get("ADMIN_EMAILS", "").split(",") if e.strip()}
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def get_token_payload(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> dict:
+    """Claims of a valid, unrevoked access token."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -31,7 +29,31 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    if payload.get("type") == "refresh":
+        raise credentials_exception
+    # Only touches the database when the Bloom filter reports a possible hit.
+    if revocations.is_revoked(db, payload.get("jti"), payload.get("fam")):
         raise credentials_exception
-    return user 
\ No newline at end of file
+    return payload
+
+def get_current_user(payload: dict = Depends(get_token_payload), db: Session = Depends(get_db)) -> Principal:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    email: str = payload["sub"]
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
+    row = db.query(User.id, User.email).filter(User.email == email).first()
+    if row is None:
+        raise credentials_exception
+    principal = Principal(id=row.id, email=row.email)
+    principal_cache.set(email, principal)
+    return principal 
+
+def get_admin_user(current_user: Principal = Depends(get_current_user)) -> Principal:
+    if current_user.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Not authorized to access internal endpoints.")
+    return current_user
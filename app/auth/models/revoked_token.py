@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime, func
+from app.core.base import Base
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # jti of a single token, or the family id shared by a refresh-token chain.
+    token_id = Column(String(64), unique=True, index=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,23 @@
+import os
+from dataclasses import dataclass
+from app.core.cache import TTLCache
+
+PRINCIPAL_CACHE_SIZE = int(os.environ.get("PRINCIPAL_CACHE_SIZE", 1024))
+PRINCIPAL_CACHE_TTL = int(os.environ.get("PRINCIPAL_CACHE_TTL", 60))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller: the user fields routes need, detached from any session."""
+    id: int
+    email: str
+
+
+# Principals of verified tokens keyed by the token subject (email). The token
+# itself is still verified on every request; only the user lookup is cached.
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+
+def invalidate_principal(*emails: str) -> None:
+    """Drop cached principals; call whenever a user is changed or removed."""
+    principal_cache.delete(*emails)
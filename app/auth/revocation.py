@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.auth.models.revoked_token import RevokedToken
+from app.core.bloom import BloomFilter
+from app.core.database import SessionLocal
+
+REVOCATION_BLOOM_CAPACITY = int(os.environ.get("REVOCATION_BLOOM_CAPACITY", 100000))
+REVOCATION_BLOOM_ERROR_RATE = float(os.environ.get("REVOCATION_BLOOM_ERROR_RATE", 0.001))
+# How often each process picks up revocations made by other processes, and how
+# often the filter is rebuilt without expired entries.
+REVOCATION_SYNC_SECONDS = int(os.environ.get("REVOCATION_SYNC_SECONDS", 30))
+REVOCATION_REBUILD_SECONDS = int(os.environ.get("REVOCATION_REBUILD_SECONDS", 3600))
+
+
+class RevocationList:
+    """
+    Revoked token ids (jti or refresh-family ids), persisted in revoked_tokens
+    and mirrored in an in-memory Bloom filter. A token that is not in the
+    filter is certainly not revoked, so ordinary requests never query the
+    database; only filter hits (revoked tokens and rare false positives) are
+    confirmed against the deny-list.
+    """
+
+    def __init__(self, capacity: int = REVOCATION_BLOOM_CAPACITY, error_rate: float = REVOCATION_BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._last_id = 0
+        self._rebuilt_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def revoke(self, db: Session, token_id: Optional[str], expires_at: datetime) -> bool:
+        """
+        Add `token_id` to the deny-list. Returns False if it was already there,
+        whichever process put it there: the unique token_id makes the insert
+        the single point where concurrent revocations of one id are decided.
+        """
+        if not token_id:
+            return False
+        db.add(RevokedToken(token_id=token_id, expires_at=expires_at))
+        try:
+            db.commit()
+            revoked = True
+        except IntegrityError:
+            db.rollback()
+            revoked = False
+        with self._lock:
+            self._bloom.add(token_id)
+        return revoked
+
+    def is_revoked(self, db: Session, *token_ids: Optional[str]) -> bool:
+        """
+        Fast check for every authenticated request. Revocations made by other
+        processes are seen only after their next sync; use is_revoked_in_db
+        where that window matters.
+        """
+        with self._lock:
+            candidates = [token_id for token_id in token_ids if token_id and token_id in self._bloom]
+        return self.is_revoked_in_db(db, *candidates)
+
+    def is_revoked_in_db(self, db: Session, *token_ids: Optional[str]) -> bool:
+        """Authoritative check against the deny-list, bypassing the Bloom filter."""
+        candidates = [token_id for token_id in token_ids if token_id]
+        if not candidates:
+            return False
+        return db.query(RevokedToken.id).filter(RevokedToken.token_id.in_(candidates)).first() is not None
+
+    def sync(self, db: Session) -> None:
+        """Load revocations added since the last sync; periodically rebuild from scratch."""
+        now = datetime.utcnow()
+        if self._rebuilt_at is None or time.monotonic() - self._rebuilt_at >= REVOCATION_REBUILD_SECONDS:
+            db.query(RevokedToken).filter(RevokedToken.expires_at < now).delete(synchronize_session=False)
+            db.commit()
+            rows = db.query(RevokedToken.id, RevokedToken.token_id).filter(RevokedToken.expires_at >= now).all()
+            bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+            for row in rows:
+                bloom.add(row.token_id)
+            with self._lock:
+                self._bloom = bloom
+                self._last_id = max((row.id for row in rows), default=0)
+                self._rebuilt_at = time.monotonic()
+            return
+        rows = (
+            db.query(RevokedToken.id, RevokedToken.token_id)
+            .filter(RevokedToken.id > self._last_id, RevokedToken.expires_at >= now)
+            .all()
+        )
+        with self._lock:
+            for row in rows:
+                self._bloom.add(row.token_id)
+                self._last_id = max(self._last_id, row.id)
+
+    def load(self) -> None:
+        db = SessionLocal()
+        try:
+            self.sync(db)
+        finally:
+            db.close()
+
+
+revocations = RevocationList()
+
+
+async def run_revocation_sync(interval_seconds: int = REVOCATION_SYNC_SECONDS) -> None:
+    """Background task started from the app lifespan."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(revocations.load)
+        except Exception as e:
+            logging.error(f"Revocations: sync failed: {e}")
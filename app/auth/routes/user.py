@@ -1,35 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from starlette.concurrency import run_in_threadpool
+from app.core.database import get_db
 from app.auth.models.user import User
-from app.auth.schemas.user import UserCreate, UserLogin, UserOut
-from app.auth.auth import get_password_hash
-from typing import Generator
-from app.auth.auth_service import AuthService
+from app.auth.schemas.user import UserCreate, UserLogin, UserOut, RefreshRequest
+from app.auth.dependencies import get_token_payload
+from app.auth.auth import get_password_hash_async
+from app.auth.auth_service import AuthService, login_ip_limiter
+from app.auth.principal import invalidate_principal
 
 router = APIRouter()
 
-def get_db() -> Generator:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/register", response_model=UserOut, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, request: Request, db: Session = Depends(get_db)):
     if not user.email.endswith("@l4it.net"):
         raise HTTPException(status_code=400, detail="Email must end with @l4it.net")
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    login_ip_limiter.check(request.client.host if request.client else "")
+    existing_user = await run_in_threadpool(lambda: db.query(User).filter(User.email == user.email).first())
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = get_password_hash(user.password)
-    db_user = User(email=user.email, hashed_password=hashed_password)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    hashed_password = await get_password_hash_async(user.password)
+
+    def save():
+        db_user = User(email=user.email, hashed_password=hashed_password)
+        db.add(db_user)
+        db.commit()
+        db.refresh(db_user)
+        return db_user
+
+    db_user = await run_in_threadpool(save)
+    invalidate_principal(db_user.email)
     return db_user
 
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    return AuthService.login(db, user.email, user.password) 
\ No newline at end of file
+async def login(user: UserLogin, request: Request, db: Session = Depends(get_db)):
+    client_ip = request.client.host if request.client else ""
+    return await AuthService.login(db, user.email, user.password, client_ip) 
+
+@router.post("/refresh")
+def refresh(body: RefreshRequest, db: Session = Depends(get_db)):
+    return AuthService.refresh(db, body.refresh_token)
+
+@router.post("/logout")
+def logout(payload: dict = Depends(get_token_payload), db: Session = Depends(get_db)):
+    AuthService.logout(db, payload)
+    return {"detail": "Logged out."}
@@ -8,6 +8,9 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class UserOut(BaseModel):
     id: int
     email: EmailStr
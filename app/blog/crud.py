@@ -1,7 +1,12 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, defer, joinedload
+from app.core.pagination import keyset_page
 from app.blog.models.blog import Blog
 from app.blog.schemas.blog import BlogCreate, BlogUpdate
-from typing import List, Optional
+from typing import List, Optional, Tuple
+
+# Relationships every blog response needs, loaded in the same query.
+READ_OPTIONS = (joinedload(Blog.author), joinedload(Blog.image_meta), joinedload(Blog.thumbnail_meta))
 
 def create_blog(db: Session, blog: BlogCreate) -> Blog:
     db_blog = Blog(**blog.model_dump())
@@ -11,13 +16,37 @@ def create_blog(db: Session, blog: BlogCreate) -> Blog:
     return db_blog
 
 def get_blog(db: Session, blog_id: int) -> Optional[Blog]:
-    return db.query(Blog).filter(Blog.id == blog_id).first()
+    return db.query(Blog).options(*READ_OPTIONS).filter(Blog.id == blog_id).first()
+
+def get_blog_by_slug(db: Session, slug: str) -> Optional[Blog]:
+    return db.query(Blog).options(*READ_OPTIONS).filter(Blog.slug == slug).first()
 
 def get_blogs(db: Session, skip: int = 0, limit: int = 10) -> List[Blog]:
-    return db.query(Blog).offset(skip).limit(limit).all()
+    return db.query(Blog).options(*READ_OPTIONS, defer(Blog.content)).offset(skip).limit(limit).all()
+
+def get_blogs_page(db: Session, cursor: Optional[str] = None, limit: int = 10) -> Tuple[List[Blog], Optional[str]]:
+    return keyset_page(db.query(Blog).options(*READ_OPTIONS, defer(Blog.content)), Blog.created_at, Blog.id, cursor, limit)
+
+def get_blogs_by_type(db: Session, type: str, skip: int = 0, limit: int = 10) -> List[Blog]:
+    return (
+        db.query(Blog)
+        .options(*READ_OPTIONS, defer(Blog.content))
+        .filter(Blog.type == type)
+        .order_by(Blog.created_at.desc(), Blog.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+def get_blogs_by_type_page(db: Session, type: str, cursor: Optional[str] = None, limit: int = 10) -> Tuple[List[Blog], Optional[str]]:
+    query = db.query(Blog).options(*READ_OPTIONS, defer(Blog.content)).filter(Blog.type == type)
+    return keyset_page(query, Blog.created_at, Blog.id, cursor, limit)
+
+def get_blog_type_counts(db: Session) -> List[Tuple[str, int]]:
+    return db.query(Blog.type, func.count(Blog.id)).group_by(Blog.type).order_by(Blog.type).all()
 
 def get_blogs_by_user(db: Session, user_id: int) -> List[Blog]:
-    return db.query(Blog).filter(Blog.user_id == user_id).all()
+    return db.query(Blog).options(*READ_OPTIONS).filter(Blog.user_id == user_id).all()
 
 def update_blog(db: Session, blog_id: int, blog: BlogUpdate) -> Optional[Blog]:
     db_blog = db.query(Blog).filter(Blog.id == blog_id).first()
@@ -1,8 +1,15 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func, Index
+from sqlalchemy.orm import relationship
+from app.auth.models.user import User
 from app.core.base import Base
+from app.media.models.media import MediaFile
 
 class Blog(Base):
     __tablename__ = "blogs"
+    __table_args__ = (
+        Index("ix_blogs_created_at_id", "created_at", "id"),
+        Index("ix_blogs_type_created_at", "type", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -13,9 +20,12 @@ class Blog(Base):
     content = Column(Text, nullable=False)
     meta_title = Column(String(255), nullable=True)
     meta_description = Column(String(512), nullable=True)
-    type = Column(String, nullable=False) 
+    type = Column(String(100), nullable=False)
     slug = Column(String, unique=True, index=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     blog_data_raw = Column(String(255), nullable=True)
 
+    author = relationship(User)
+    image_meta = relationship(MediaFile, primaryjoin="foreign(Blog.image) == MediaFile.path", viewonly=True)
+    thumbnail_meta = relationship(MediaFile, primaryjoin="foreign(Blog.thumbnail) == MediaFile.path", viewonly=True)
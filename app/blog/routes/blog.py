@@ -1,31 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
-from app.core.database import SessionLocal
-from app.blog.schemas.blog import BlogCreate, BlogUpdate, BlogOut
-from app.blog.crud import create_blog, get_blog, get_blogs, update_blog, delete_blog, get_blogs_by_user
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional, Union
+from app.core.database import get_db, get_read_db, read_endpoint
+from app.core.cache import TTLCache
+from app.core.conditional import conditional_response, table_signature
+from app.core.search import ModelSearch
+from app.core.pagination import CursorPage
+from app.blog.schemas.blog import BlogCreate, BlogUpdate, BlogOut, BlogSummary, BlogSearchResult, BlogTypeCount
+from app.blog.crud import (
+    create_blog,
+    get_blog,
+    get_blog_by_slug,
+    get_blogs,
+    get_blogs_page,
+    get_blogs_by_type,
+    get_blogs_by_type_page,
+    get_blog_type_counts,
+    update_blog,
+    delete_blog,
+    get_blogs_by_user,
+)
 import os
-import shutil
 from app.auth.dependencies import get_current_user
-from app.auth.models.user import User
+from app.auth.principal import Principal
 from fastapi.responses import JSONResponse
 from app.blog.models.blog import Blog
+from app.media.crud import store_upload, add_reference, release_reference, swap_reference
+from app.media.storage import storage
+from app.media.variants import variant_srcset
+from app.media.models.media import MediaFile
+from app.media.schemas.media import MediaMeta
 from slugify import slugify 
 import uuid
 
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
 UPLOAD_DIR = "static/uploads"
-BASE_URL = "https://l4it.net/api/"
+BLOG_CACHE_SIZE = int(os.environ.get("BLOG_CACHE_SIZE", 1024))
+BLOG_CACHE_TTL = int(os.environ.get("BLOG_CACHE_TTL", 300))
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# (BlogOut, image path, thumbnail path) keyed by ("id", blog_id) and
+# ("slug", slug), plus the per-type post counts under ("types",).
+blog_cache = TTLCache(maxsize=BLOG_CACHE_SIZE, ttl=BLOG_CACHE_TTL)
+blog_search = ModelSearch(Blog, weights={"heading": 3, "short_description": 2, "content": 1})
+
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def to_blog_out(blog: Blog, schema=BlogOut):
+    blog_dict = blog.__dict__.copy()
+    blog_dict["author_email"] = blog.author.email if blog.author else None
+    blog_dict["image_srcset"] = variant_srcset(blog.image, blog.image_meta)
+    blog_dict["thumbnail_srcset"] = variant_srcset(blog.thumbnail, blog.thumbnail_meta)
+    blog_dict["image_meta"] = MediaMeta.model_validate(blog.image_meta) if blog.image_meta else None
+    blog_dict["thumbnail_meta"] = MediaMeta.model_validate(blog.thumbnail_meta) if blog.thumbnail_meta else None
+    if blog_dict.get("image"):
+        blog_dict["image"] = storage.url(blog_dict["image"])
+    if blog_dict.get("thumbnail"):
+        blog_dict["thumbnail"] = storage.url(blog_dict["thumbnail"])
+    return schema(**blog_dict)
+
+def invalidate_blog_cache(blog_id: int, *slugs: Optional[str]) -> None:
+    blog_cache.delete(("id", blog_id), ("types",), *[("slug", s) for s in slugs if s])
+
+def read_single_blog(db: Session, request: Request, response: Response, key: tuple, criterion, load):
+    """
+    One post through blog_cache with conditional GET support. Variants are
+    generated after the upload, so the srcsets are part of the validator: a
+    post cached or sent before its variants existed is rebuilt, and gets a
+    new ETag, once they appear.
+    """
+    cached = blog_cache.get(key)
+    if cached is not None:
+        blog_out, image, thumbnail = cached
+        updated_at = blog_out.updated_at
+    else:
+        row = db.query(Blog.updated_at, Blog.image, Blog.thumbnail).filter(criterion).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        updated_at, image, thumbnail = row
+    paths = [path for path in (image, thumbnail) if path]
+    media = {row.path: row for row in db.query(MediaFile.path, MediaFile.variants).filter(MediaFile.path.in_(paths))}
+    srcsets = (variant_srcset(image, media.get(image)), variant_srcset(thumbnail, media.get(thumbnail)))
+    not_modified = conditional_response(request, response, (updated_at, *srcsets), updated_at)
+    if not_modified:
+        return not_modified
+    if cached is not None and (blog_out.image_srcset, blog_out.thumbnail_srcset) == srcsets:
+        return blog_out
+    blog = load()
+    if not blog:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    blog_out = to_blog_out(blog)
+    blog_cache.set(key, (blog_out, blog.image, blog.thumbnail))
+    return blog_out
 
 @router.post("/", response_model=BlogOut, status_code=status.HTTP_201_CREATED)
 async def create(
@@ -40,7 +106,7 @@ async def create(
     slug: Optional[str] = Form(None),
     blog_data_raw: Optional[str] = Form(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     if slug and slug.strip() != "":
         base_slug = slug.lower().replace(" ", "-")
@@ -56,20 +122,13 @@ async def create(
     if image:
         if image.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid image format. Allowed: jpg, png, gif, webp")
-        file_location = os.path.join(UPLOAD_DIR, image.filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        image_path = f"/{file_location.replace(os.sep, '/')}"
+        image_path = await store_upload(db, image, UPLOAD_DIR)
 
     thumbnail_path = None
     if thumbnail:
         if thumbnail.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid image format. Allowed: jpg, png, gif, webp")
-        thumbnail_filename = f"thumb_{thumbnail.filename}"
-        file_location = os.path.join(UPLOAD_DIR,thumbnail_filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(thumbnail.file, buffer)
-        thumbnail_path = f"/{file_location.replace(os.sep, '/')}"
+        thumbnail_path = await store_upload(db, thumbnail, UPLOAD_DIR)
 
     blog_data = BlogCreate(
         heading=heading,
@@ -84,73 +143,95 @@ async def create(
         slug=slug,
         blog_data_raw=blog_data_raw,
     )
-    return create_blog(db, blog_data)
+    created = create_blog(db, blog_data)
+    add_reference(db, created.image)
+    add_reference(db, created.thumbnail)
+    invalidate_blog_cache(created.id, created.slug)
+    blog_search.index_row(db, created)
+    return created
 
-@router.get("/", response_model=List[BlogOut])
-def read_blogs(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    blogs = db.query(Blog).offset(skip).limit(limit).all()
-    result = []
-    for blog in blogs:
-        user = db.query(User).filter(User.id == blog.user_id).first()
-        author_email = user.email if user else None
-        blog_dict = blog.__dict__.copy()
-        blog_dict["author_email"] = author_email
-        if blog_dict.get("image"):
-            blog_dict["image"] = f"{BASE_URL}{blog_dict['image']}"
-        if blog_dict.get("thumbnail"):
-            blog_dict["thumbnail"] = f"{BASE_URL}{blog_dict['thumbnail']}"
-        result.append(BlogOut(**blog_dict))
-    return result
+@router.get("/", response_model=Union[List[BlogSummary], CursorPage[BlogSummary]])
+@read_endpoint
+def read_blogs(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    count, last_modified = table_signature(db, Blog)
+    not_modified = conditional_response(request, response, (count, last_modified), last_modified)
+    if not_modified:
+        return not_modified
+    if cursor is not None:
+        blogs, next_cursor = get_blogs_page(db, cursor=cursor, limit=limit)
+        return CursorPage[BlogSummary](items=[to_blog_out(blog, BlogSummary) for blog in blogs], next_cursor=next_cursor)
+    blogs = get_blogs(db, skip=skip, limit=limit)
+    return [to_blog_out(blog, BlogSummary) for blog in blogs]
 
 @router.get("/id/{blog_id}", response_model=BlogOut)
-def read_blog(blog_id: int, db: Session = Depends(get_db)):
-    blog = get_blog(db, blog_id)
-    if not blog:
-        raise HTTPException(status_code=404, detail="Blog not found")
-    user = db.query(User).filter(User.id == blog.user_id).first()
-    author_email = user.email if user else None
-    blog_dict = blog.__dict__.copy()
-    blog_dict["author_email"] = author_email
-    if blog_dict.get("image"):
-            blog_dict["image"] = f"{BASE_URL}{blog_dict['image']}"
-    if blog_dict.get("thumbnail"):
-        blog_dict["thumbnail"] = f"{BASE_URL}{blog_dict['thumbnail']}"
-    return BlogOut(**blog_dict)
+@read_endpoint
+def read_blog(blog_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    return read_single_blog(db, request, response, ("id", blog_id), Blog.id == blog_id, lambda: get_blog(db, blog_id))
+
+@router.get("/types", response_model=List[BlogTypeCount])
+@read_endpoint
+def read_blog_types(db: Session = Depends(get_read_db)):
+    counts = blog_cache.get(("types",))
+    if counts is None:
+        counts = [BlogTypeCount(type=type, count=count) for type, count in get_blog_type_counts(db)]
+        blog_cache.set(("types",), counts)
+    return counts
 
-@router.get("/type/{type}", response_model=List[BlogOut])
-def read_blog_by_type(type: str, db: Session = Depends(get_db)):
-    blogs = db.query(Blog).filter(Blog.type == type).all()
-    result = []
-    if not blogs:
+@router.get("/type/{type}", response_model=Union[List[BlogSummary], CursorPage[BlogSummary]])
+@read_endpoint
+def read_blog_by_type(
+    type: str,
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    count, last_modified = table_signature(db, Blog, Blog.type == type)
+    if not count:
         raise HTTPException(status_code=404, detail="Blog not found")
-    else:
-        for blog in blogs:
-            user = db.query(User).filter(User.id == blog.user_id).first()
-            author_email = user.email if user else None
-            blog_dict = blog.__dict__.copy()
-            blog_dict["author_email"] = author_email
-            if blog_dict.get("image"):
-                blog_dict["image"] = f"{BASE_URL}{blog_dict['image']}"
-            if blog_dict.get("thumbnail"):
-                blog_dict["thumbnail"] = f"{BASE_URL}{blog_dict['thumbnail']}"
-            result.append(BlogOut(**blog_dict))
-        return result
+    not_modified = conditional_response(request, response, (count, last_modified), last_modified)
+    if not_modified:
+        return not_modified
+    if cursor is not None:
+        blogs, next_cursor = get_blogs_by_type_page(db, type, cursor=cursor, limit=limit)
+        return CursorPage[BlogSummary](items=[to_blog_out(blog, BlogSummary) for blog in blogs], next_cursor=next_cursor)
+    blogs = get_blogs_by_type(db, type, skip=skip, limit=limit)
+    return [to_blog_out(blog, BlogSummary) for blog in blogs]
+
 
+@router.get("/search", response_model=List[BlogSearchResult])
+@read_endpoint
+def search_blogs(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=100), db: Session = Depends(get_read_db)):
+    return [
+        BlogSearchResult(
+            id=blog.id,
+            heading=blog.heading,
+            slug=blog.slug,
+            short_description=blog.short_description,
+            thumbnail=storage.url(blog.thumbnail) if blog.thumbnail else None,
+            score=score,
+            snippet=snippet,
+        )
+        for blog, score, snippet in blog_search.search(db, q, limit)
+    ]
+
+@router.get("/cache/stats")
+def read_blog_cache_stats(current_user: Principal = Depends(get_current_user)):
+    return blog_cache.stats()
 
 @router.get("/{slug}", response_model=BlogOut)
-def read_blog_by_slug(slug: str, db: Session = Depends(get_db)):
-    blog = db.query(Blog).filter(Blog.slug == slug).first()
-    if not blog:
-        raise HTTPException(status_code=404, detail="Blog not found")
-    user = db.query(User).filter(User.id == blog.user_id).first()
-    author_email = user.email if user else None
-    blog_dict = blog.__dict__.copy()
-    blog_dict["author_email"] = author_email
-    if blog_dict.get("image"):
-        blog_dict["image"] = f"{BASE_URL}{blog_dict['image']}"
-    if blog_dict.get("thumbnail"):
-        blog_dict["thumbnail"] = f"{BASE_URL}{blog_dict['thumbnail']}"
-    return BlogOut(**blog_dict)
+@read_endpoint
+def read_blog_by_slug(slug: str, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    return read_single_blog(db, request, response, ("slug", slug), Blog.slug == slug, lambda: get_blog_by_slug(db, slug))
 
 @router.post("/update/{blog_id}", response_model=BlogOut)
 async def update(
@@ -167,7 +248,7 @@ async def update(
     thumbnail_path: Optional[str] = Form(None), # same as img
     slug: Optional[str] = Form(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     blog_data_raw: Optional[str] = Form(None)
 
 ):
@@ -188,6 +269,8 @@ async def update(
         raise HTTPException(status_code=404, detail="Blog not found")
     if blog.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to update this blog.")
+    old_slug = blog.slug
+    old_image, old_thumbnail = blog.image, blog.thumbnail
     
     # Handle image logic
     final_image_path = None
@@ -195,10 +278,7 @@ async def update(
         # New image uploaded
         if image.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid image format. Allowed: jpg, png, gif, webp")
-        file_location = os.path.join(UPLOAD_DIR, image.filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        final_image_path = f"/{file_location.replace(os.sep, '/')}"
+        final_image_path = await store_upload(db, image, UPLOAD_DIR)
     elif image_path:
         # Preserve existing image path sent from frontend
         final_image_path = image_path
@@ -211,11 +291,7 @@ async def update(
         # New thumbnail uploaded
         if thumbnail.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid image format. Allowed: jpg, png, gif, webp")
-        thumbnail_filename = f"thumb_{thumbnail.filename}"
-        file_location = os.path.join(UPLOAD_DIR,thumbnail_filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(thumbnail.file, buffer)
-        final_thumbnail_path = f"/{file_location.replace(os.sep, '/')}"
+        final_thumbnail_path = await store_upload(db, thumbnail, UPLOAD_DIR)
     elif thumbnail_path:
         # Preserve existing thumbnail path sent from frontend
         final_thumbnail_path = thumbnail_path
@@ -238,20 +314,30 @@ async def update(
         
     )
     updated = update_blog(db, blog_id, blog_data)
+    swap_reference(db, old_image, updated.image)
+    swap_reference(db, old_thumbnail, updated.thumbnail)
+    invalidate_blog_cache(blog_id, old_slug, updated.slug)
+    blog_search.index_row(db, updated)
     return updated
 
 @router.post("/delete/{blog_id}", status_code=status.HTTP_200_OK)
-def delete(blog_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def delete(blog_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     blog = get_blog(db, blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
     if blog.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this blog.")
+    old_slug = blog.slug
+    old_image, old_thumbnail = blog.image, blog.thumbnail
     success = delete_blog(db, blog_id)
+    release_reference(db, old_image)
+    release_reference(db, old_thumbnail)
+    invalidate_blog_cache(blog_id, old_slug)
+    blog_search.remove_row(db, blog_id)
     return JSONResponse(content={"detail": "Blog deleted successfully."}, status_code=200)
 
 @router.get("/user/{user_id}", response_model=List[BlogOut])
-def get_blogs_by_user_route(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_blogs_by_user_route(user_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     if user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view these blogs.")
     return get_blogs_by_user(db, user_id) 
\ No newline at end of file
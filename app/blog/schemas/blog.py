@@ -1,6 +1,7 @@
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Dict, Optional
+from app.media.schemas.media import MediaMeta
 
 class BlogBase(BaseModel):
     image: Optional[str] = None
@@ -24,7 +25,45 @@ class BlogOut(BlogBase):
     id: int
     user_id: int
     author_email: Optional[str] = None
+    image_srcset: Optional[Dict[str, str]] = None
+    thumbnail_srcset: Optional[Dict[str, str]] = None
+    image_meta: Optional[MediaMeta] = None
+    thumbnail_meta: Optional[MediaMeta] = None
     created_at: datetime
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+class BlogSummary(BaseModel):
+    id: int
+    user_id: int
+    image: Optional[str] = None
+    thumbnail: Optional[str] = None
+    heading: str
+    type: Optional[str] = None
+    slug: Optional[str] = None
+    short_description: str
+    meta_title: Optional[str] = None
+    meta_description: Optional[str] = None
+    author_email: Optional[str] = None
+    image_srcset: Optional[Dict[str, str]] = None
+    thumbnail_srcset: Optional[Dict[str, str]] = None
+    image_meta: Optional[MediaMeta] = None
+    thumbnail_meta: Optional[MediaMeta] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+class BlogTypeCount(BaseModel):
+    type: str
+    count: int
+
+class BlogSearchResult(BaseModel):
+    id: int
+    heading: str
+    slug: Optional[str] = None
+    short_description: str
+    thumbnail: Optional[str] = None
+    score: float
+    snippet: str
@@ -1,7 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer, joinedload
+from app.core.pagination import keyset_page
 from .models.model import CaseStudy
 from .schemas.schema import CaseStudyCreate, CaseStudyUpdate
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 def create_case_study(db: Session, case_study: CaseStudyCreate) -> CaseStudy:
     db_case_study = CaseStudy(**case_study.model_dump())
@@ -11,10 +12,13 @@ def create_case_study(db: Session, case_study: CaseStudyCreate) -> CaseStudy:
     return db_case_study
 
 def get_case_study(db: Session, case_study_id: int) -> Optional[CaseStudy]:
-    return db.query(CaseStudy).filter(CaseStudy.id == case_study_id).first()
+    return db.query(CaseStudy).options(joinedload(CaseStudy.image_meta)).filter(CaseStudy.id == case_study_id).first()
 
 def get_case_studies(db: Session, skip: int = 0, limit: int = 10) -> List[CaseStudy]:
-    return db.query(CaseStudy).offset(skip).limit(limit).all()
+    return db.query(CaseStudy).options(joinedload(CaseStudy.image_meta), defer(CaseStudy.content)).offset(skip).limit(limit).all()
+
+def get_case_studies_page(db: Session, cursor: Optional[str] = None, limit: int = 10) -> Tuple[List[CaseStudy], Optional[str]]:
+    return keyset_page(db.query(CaseStudy).options(joinedload(CaseStudy.image_meta), defer(CaseStudy.content)), CaseStudy.created_at, CaseStudy.id, cursor, limit)
 
 def update_case_study(db: Session, case_study_id: int, case_study: CaseStudyUpdate) -> Optional[CaseStudy]:
     db_case_study = db.query(CaseStudy).filter(CaseStudy.id == case_study_id).first()
@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, func, Index
+from sqlalchemy.orm import relationship
 from app.core.base import Base
+from app.media.models.media import MediaFile
 
 class CaseStudy(Base):
     __tablename__ = "case_studies"
+    __table_args__ = (Index("ix_case_studies_created_at_id", "created_at", "id"),)
     id = Column(Integer, primary_key=True, index=True)
     image = Column(String(255), nullable=True)
     heading = Column(String(255), nullable=False)
@@ -13,3 +16,5 @@ class CaseStudy(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    image_meta = relationship(MediaFile, primaryjoin="foreign(CaseStudy.image) == MediaFile.path", viewonly=True)
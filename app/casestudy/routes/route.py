@@ -1,30 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.core.database import SessionLocal
-from ..schemas.schema import CaseStudyCreate, CaseStudyUpdate, CaseStudyOut
+from typing import List, Optional, Union
+from app.core.database import get_db, get_read_db, read_endpoint
+from app.core.conditional import conditional_response, table_signature
+from app.core.pagination import CursorPage
+from app.media.crud import store_upload, add_reference, release_reference, swap_reference
+from app.core.search import ModelSearch
+from ..models.model import CaseStudy
+from ..schemas.schema import CaseStudyCreate, CaseStudyUpdate, CaseStudyOut, CaseStudySummary, CaseStudySearchResult
 from ..logic import (
     create_case_study, 
     get_case_study, 
     get_case_studies, 
+    get_case_studies_page,
     update_case_study, 
     delete_case_study
 )
 import os
-import shutil
 
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
 UPLOAD_DIR = "static/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 router = APIRouter()
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+case_study_search = ModelSearch(CaseStudy, weights={"heading": 3, "short_description": 2, "content": 1})
 
 @router.post("/", response_model=CaseStudyOut, status_code=status.HTTP_201_CREATED)
 async def create(
@@ -40,10 +39,7 @@ async def create(
     if image:
         if image.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid image format. Allowed: jpg, png, gif, webp")
-        file_location = os.path.join(UPLOAD_DIR, image.filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        image_path = f"/{file_location.replace(os.sep, '/')}"
+        image_path = await store_upload(db, image, UPLOAD_DIR)
     case_study_data = CaseStudyCreate(
         heading=heading,
         short_description=short_description,
@@ -52,14 +48,57 @@ async def create(
         meta_description=meta_description,
         image=image_path
     )
-    return create_case_study(db, case_study_data)
+    created = create_case_study(db, case_study_data)
+    add_reference(db, created.image)
+    case_study_search.index_row(db, created)
+    return created
 
-@router.get("/", response_model=List[CaseStudyOut])
-def read_case_studies(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+@router.get("/", response_model=Union[List[CaseStudySummary], CursorPage[CaseStudySummary]])
+@read_endpoint
+def read_case_studies(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    count, last_modified = table_signature(db, CaseStudy)
+    not_modified = conditional_response(request, response, (count, last_modified), last_modified)
+    if not_modified:
+        return not_modified
+    if cursor is not None:
+        case_studies, next_cursor = get_case_studies_page(db, cursor=cursor, limit=limit)
+        return CursorPage[CaseStudySummary](
+            items=[CaseStudySummary.model_validate(case_study) for case_study in case_studies],
+            next_cursor=next_cursor,
+        )
     return get_case_studies(db, skip=skip, limit=limit)
 
+@router.get("/search", response_model=List[CaseStudySearchResult])
+@read_endpoint
+def search_case_studies(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=100), db: Session = Depends(get_read_db)):
+    return [
+        CaseStudySearchResult(
+            id=case_study.id,
+            heading=case_study.heading,
+            short_description=case_study.short_description,
+            image=case_study.image,
+            score=score,
+            snippet=snippet,
+        )
+        for case_study, score, snippet in case_study_search.search(db, q, limit)
+    ]
+
 @router.get("/{case_study_id}", response_model=CaseStudyOut)
-def read_case_study(case_study_id: int, db: Session = Depends(get_db)):
+@read_endpoint
+def read_case_study(case_study_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    updated_at = db.query(CaseStudy.updated_at).filter(CaseStudy.id == case_study_id).scalar()
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail="Case study not found")
+    not_modified = conditional_response(request, response, (updated_at,), updated_at)
+    if not_modified:
+        return not_modified
     case_study = get_case_study(db, case_study_id)
     if not case_study:
         raise HTTPException(status_code=404, detail="Case study not found")
@@ -80,15 +119,13 @@ async def update(
     case_study = get_case_study(db, case_study_id)
     if not case_study:
         raise HTTPException(status_code=404, detail="Case study not found")
+    old_image = case_study.image
     
     final_image_path = None
     if image:
         if image.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid image format. Allowed: jpg, png, gif, webp")
-        file_location = os.path.join(UPLOAD_DIR, image.filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        final_image_path = f"/{file_location.replace(os.sep, '/')}"
+        final_image_path = await store_upload(db, image, UPLOAD_DIR)
     elif image_path:
         final_image_path = image_path
     else:
@@ -103,11 +140,17 @@ async def update(
         image=final_image_path
     )
     updated = update_case_study(db, case_study_id, case_study_data)
+    swap_reference(db, old_image, updated.image)
+    case_study_search.index_row(db, updated)
     return updated
 
 @router.delete("/{case_study_id}", status_code=status.HTTP_200_OK)
 def delete(case_study_id: int, db: Session = Depends(get_db)):
-    success = delete_case_study(db, case_study_id)
-    if not success:
+    case_study = get_case_study(db, case_study_id)
+    if not case_study:
         raise HTTPException(status_code=404, detail="Case study not found")
+    old_image = case_study.image
+    delete_case_study(db, case_study_id)
+    release_reference(db, old_image)
+    case_study_search.remove_row(db, case_study_id)
     return {"detail": "Case study deleted successfully."}
\ No newline at end of file
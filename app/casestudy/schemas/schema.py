@@ -1,6 +1,7 @@
 from pydantic import BaseModel, ConfigDict
 from typing import Optional
 from datetime import datetime
+from app.media.schemas.media import MediaMeta
 
 class CaseStudyBase(BaseModel):
     image: Optional[str] = None
@@ -20,5 +21,27 @@ class CaseStudyOut(CaseStudyBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    image_meta: Optional[MediaMeta] = None
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class CaseStudySummary(BaseModel):
+    id: int
+    image: Optional[str] = None
+    heading: str
+    short_description: str
+    meta_title: Optional[str] = None
+    meta_description: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    image_meta: Optional[MediaMeta] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class CaseStudySearchResult(BaseModel):
+    id: int
+    heading: str
+    short_description: str
+    image: Optional[str] = None
+    score: float
+    snippet: str
@@ -0,0 +1,261 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import List
+from dotenv import load_dotenv
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from starlette.concurrency import run_in_threadpool
+from app.core.database import SessionLocal
+from .models import models
+from .schemas import schema
+
+load_dotenv()
+
+# "direct" inserts each submission in the request; "queued" journals it and
+# lets a background worker insert submissions in batches.
+CONTACT_INGEST_MODE = os.environ.get("CONTACT_INGEST_MODE", "direct")
+CONTACT_JOURNAL_DIR = os.environ.get("CONTACT_JOURNAL_DIR", "data/contact-journal")
+CONTACT_FLUSH_BATCH_SIZE = int(os.environ.get("CONTACT_FLUSH_BATCH_SIZE", 200))
+CONTACT_FLUSH_INTERVAL = float(os.environ.get("CONTACT_FLUSH_INTERVAL", 2))
+
+SEGMENT_NAME = re.compile(r"^contact-(\d+)(?:-\d+\.flushing|\.jsonl)$")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ContactIngestQueue:
+    """
+    Write-behind queue for contact submissions. Each submission is appended
+    and fsynced to this process's journal before it is acknowledged, kept in
+    memory, and inserted with the rest of its batch once the batch is full or
+    CONTACT_FLUSH_INTERVAL has passed. Before a flush the journal is rotated to
+    a .flushing segment, which is deleted only after the insert commits, so a
+    crash at any point leaves the submissions on disk for recovery at the
+    next start. Rows carry a unique reference, so replaying a segment whose
+    insert had already committed does not duplicate them. When a batch is
+    rejected, its rows are retried one at a time and those the database still
+    rejects are moved to the dead-letter file, so one bad row cannot hold up
+    the queue; any other error leaves the whole batch queued for the next flush.
+    """
+
+    def __init__(
+        self,
+        directory: str = CONTACT_JOURNAL_DIR,
+        batch_size: int = CONTACT_FLUSH_BATCH_SIZE,
+        flush_interval: float = CONTACT_FLUSH_INTERVAL,
+    ):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[dict] = []
+        self._segments: List[str] = []
+        self._journal = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def journal_path(self) -> str:
+        return os.path.join(self.directory, f"contact-{os.getpid()}.jsonl")
+
+    @property
+    def dead_letter_path(self) -> str:
+        return os.path.join(self.directory, "dead-letter.jsonl")
+
+    def _open_journal(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def enqueue(self, submission: schema.ContactSubmissionCreate) -> dict:
+        record = submission.model_dump()
+        record["reference"] = uuid.uuid4().hex
+        record["submission_date"] = datetime.utcnow().isoformat()
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            if self._journal is None:
+                self._open_journal()
+            self._journal.write(line)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._pending.append(record)
+            full = len(self._pending) >= self.batch_size
+        if full and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return record
+
+    def _rotate(self) -> List[dict]:
+        """Move the pending records and the journal holding them aside for a flush."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+                segment = os.path.join(self.directory, f"contact-{os.getpid()}-{time.time_ns()}.flushing")
+                os.replace(self.journal_path, segment)
+                self._segments.append(segment)
+            batch, self._pending = self._pending, []
+            return batch
+
+    def _insert(self, batch: List[dict]) -> None:
+        db = SessionLocal()
+        try:
+            references = [record["reference"] for record in batch]
+            existing = {
+                reference for (reference,) in db.query(models.ContactSubmission.reference)
+                .filter(models.ContactSubmission.reference.in_(references))
+            }
+            rows = []
+            for record in batch:
+                if record["reference"] in existing:
+                    continue
+                existing.add(record["reference"])
+                rows.append({**record, "submission_date": datetime.fromisoformat(record["submission_date"])})
+            if rows:
+                db.execute(insert(models.ContactSubmission), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    def _insert_each(self, chunk: List[dict]) -> List[dict]:
+        """Insert a rejected chunk row by row; returns the rows the database still rejects."""
+        rejected = []
+        for record in chunk:
+            try:
+                self._insert([record])
+            except (DataError, IntegrityError) as e:
+                rejected.append(record)
+                self._dead_letter(record, e)
+        return rejected
+
+    def _dead_letter(self, record: dict, error: Exception) -> None:
+        line = json.dumps({**record, "error": str(getattr(error, "orig", error))}) + "\n"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.dead_lettered += 1
+        logging.error(f"Contact ingest: submission {record['reference']} rejected, moved to {self.dead_letter_path}: {error}")
+
+    def flush(self) -> int:
+        """Insert everything pending in multi-row statements; returns the number of rows flushed."""
+        with self._flush_lock:
+            batch = self._rotate()
+            if not batch and not self._segments:
+                return 0
+            start = time.perf_counter()
+            rejected = []
+            try:
+                for offset in range(0, len(batch), self.batch_size):
+                    chunk = batch[offset:offset + self.batch_size]
+                    try:
+                        self._insert(chunk)
+                    except (DataError, IntegrityError):
+                        rejected.extend(self._insert_each(chunk))
+            except Exception as e:
+                self.failures += 1
+                logging.error(f"Contact ingest: flush of {len(batch)} submission(s) failed: {e}")
+                dead = {record["reference"] for record in rejected}
+                with self._lock:
+                    self._pending[:0] = [record for record in batch if record["reference"] not in dead]
+                return 0
+            for segment in self._segments:
+                try:
+                    os.remove(segment)
+                except FileNotFoundError:
+                    pass
+            self._segments = []
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.flushes += 1
+            self.flushed_rows += len(batch) - len(rejected)
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+            return len(batch) - len(rejected)
+
+    def recover(self) -> int:
+        """
+        Adopt journals left by processes that are no longer running. Call once
+        at startup before any submission is queued: a restarted container often
+        reuses the previous process id, so this process's own files are adopted too.
+        """
+        recovered = 0
+        for path in sorted(glob.glob(os.path.join(self.directory, "contact-*"))):
+            match = SEGMENT_NAME.match(os.path.basename(path))
+            if not match or (int(match.group(1)) != os.getpid() and _pid_alive(int(match.group(1)))):
+                continue
+            records = []
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # A torn final line from a crash mid-write was never acknowledged.
+                        if line.strip():
+                            logging.warning(f"Contact ingest: skipping unreadable line in {path}")
+            with self._lock:
+                self._pending.extend(records)
+                self._segments.append(path)
+            recovered += len(records)
+        if recovered:
+            logging.info(f"Contact ingest: recovered {recovered} journaled submission(s)")
+        return recovered
+
+    async def run(self) -> None:
+        """Background worker: flush when a batch fills up or the interval elapses."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await run_in_threadpool(self.flush)
+        finally:
+            # Final flush on shutdown; anything that fails stays journaled.
+            self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            depth = len(self._pending)
+        return {
+            "mode": CONTACT_INGEST_MODE,
+            "queue_depth": depth,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failures": self.failures,
+            "dead_lettered": self.dead_lettered,
+            "flush_ms": {
+                "last": self.last_flush_ms,
+                "max": self.max_flush_ms,
+                "mean": self._total_flush_ms / self.flushes if self.flushes else 0.0,
+            },
+        }
+
+
+contact_queue = ContactIngestQueue()
@@ -1,13 +1,92 @@
+import csv
+import io
+import json
+from datetime import datetime
 from sqlalchemy.orm import Session
+from app.core.database import SessionLocal
+from app.core.pagination import keyset_page
 from .models import models
 from .schemas import schema
+from typing import Iterator, Optional
+import uuid
 
 def create_contact_submission(db: Session, submission: schema.ContactSubmissionCreate):
-    db_submission = models.ContactSubmission(**submission.model_dump())
+    db_submission = models.ContactSubmission(**submission.model_dump(), reference=uuid.uuid4().hex)
     db.add(db_submission)
     db.commit()
     db.refresh(db_submission)
     return db_submission
 
 def get_contact_submissions(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.ContactSubmission).offset(skip).limit(limit).all()
\ No newline at end of file
+    return db.query(models.ContactSubmission).offset(skip).limit(limit).all()
+
+def get_contact_submissions_page(db: Session, cursor: Optional[str] = None, limit: int = 100):
+    return keyset_page(db.query(models.ContactSubmission), models.ContactSubmission.submission_date, models.ContactSubmission.id, cursor, limit)
+
+EXPORT_COLUMNS = (
+    "id",
+    "reference",
+    "submission_date",
+    "company_name",
+    "num_employees",
+    "first_name",
+    "last_name",
+    "business_email",
+    "phone_number",
+    "referral_source",
+    "services_needed",
+    "how_did_u_hear_us",
+    "message",
+)
+
+def iter_contact_submissions(
+    db: Session,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    batch_size: int = 1000,
+):
+    """
+    Submissions in [since, until) oldest first, as plain rows. The result is
+    streamed from a server-side cursor `batch_size` rows at a time, so memory
+    stays flat regardless of the number of rows.
+    """
+    model = models.ContactSubmission
+    query = db.query(*[getattr(model, column) for column in EXPORT_COLUMNS])
+    if since is not None:
+        query = query.filter(model.submission_date >= since)
+    if until is not None:
+        query = query.filter(model.submission_date < until)
+    query = query.order_by(model.submission_date, model.id)
+    return query.execution_options(stream_results=True).yield_per(batch_size)
+
+def stream_contact_export(
+    fmt: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    rows_per_chunk: int = 500,
+) -> Iterator[str]:
+    """
+    Encode submissions as CSV (with a header row) or NDJSON, yielding chunks
+    of `rows_per_chunk` rows. Opens its own session, because the response body
+    is produced after the request's dependencies have been closed.
+    """
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == "csv" else None
+        if writer is not None:
+            writer.writerow(EXPORT_COLUMNS)
+        count = 0
+        for row in iter_contact_submissions(db, since, until):
+            if writer is not None:
+                writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+            else:
+                buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str) + "\n")
+            count += 1
+            if count % rows_per_chunk == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    finally:
+        db.close()
@@ -1,9 +1,10 @@
 from app.core.database import Base
-from sqlalchemy import Column, String, Integer, DateTime, Text
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index
 from datetime import datetime
 
 class ContactSubmission(Base):
     __tablename__ = "contact_submissions"
+    __table_args__ = (Index("ix_contact_submissions_submission_date_id", "submission_date", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     company_name = Column(String(100), nullable=True)
@@ -16,4 +17,6 @@ class ContactSubmission(Base):
     message = Column(Text, nullable=False)
     services_needed = Column(String(200), nullable=False)
     submission_date = Column(DateTime, default=datetime.utcnow)
-    how_did_u_hear_us = Column(String(200), nullable=True)
\ No newline at end of file
+    how_did_u_hear_us = Column(String(200), nullable=True)
+    # Public id handed out before the row exists (queued ingestion).
+    reference = Column(String(32), unique=True, index=True, nullable=True)
\ No newline at end of file
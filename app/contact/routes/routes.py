@@ -1,26 +1,67 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, Union
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from ..logic import create_contact_submission, get_contact_submissions
+from app.core.pagination import CursorPage
+from ..logic import create_contact_submission, get_contact_submissions, get_contact_submissions_page, stream_contact_export
 from ..schemas import schema
+from ..ingest import CONTACT_INGEST_MODE, contact_queue
 from app.auth.dependencies import get_current_user
 
 router = APIRouter()
 
-@router.post("/submit", response_model=schema.ContactSubmissionOut)
+@router.post(
+    "/submit",
+    response_model=schema.ContactSubmissionOut,
+    responses={202: {"model": schema.ContactSubmissionQueued}},
+)
 async def submit_contact_form(
     submission: schema.ContactSubmissionCreate,
     db: Session = Depends(get_db)
 ):
-    """Submit a new contact form"""
+    """Submit a new contact form. In queued ingestion mode the submission is
+    journaled and 202 is returned with its reference; it is stored shortly after."""
+    if CONTACT_INGEST_MODE == "queued":
+        record = await run_in_threadpool(contact_queue.enqueue, submission)
+        queued = schema.ContactSubmissionQueued(reference=record["reference"])
+        return JSONResponse(status_code=202, content=queued.model_dump())
     return create_contact_submission(db, submission)
 
-@router.get("/submissions", response_model=list[schema.ContactSubmissionOut])
+@router.get(
+    "/submissions",
+    response_model=Union[list[schema.ContactSubmissionOut], CursorPage[schema.ContactSubmissionOut]],
+)
 async def get_submissions(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     _ = Depends(get_current_user)  
 ):
-    """Get all contact submissions"""
-    return get_contact_submissions(db, skip=skip, limit=limit)
\ No newline at end of file
+    """Get all contact submissions. Pass `cursor` (empty for the first page) for keyset pagination."""
+    if cursor is not None:
+        submissions, next_cursor = get_contact_submissions_page(db, cursor=cursor, limit=limit)
+        return CursorPage[schema.ContactSubmissionOut](
+            items=[schema.ContactSubmissionOut.model_validate(s) for s in submissions],
+            next_cursor=next_cursor,
+        )
+    return get_contact_submissions(db, skip=skip, limit=limit)
+
+@router.get("/submissions/export")
+def export_submissions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    _ = Depends(get_current_user),
+):
+    """Stream every submission in [since, until) as CSV or NDJSON, oldest first."""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"contact-submissions.{format}"
+    return StreamingResponse(
+        stream_contact_export(format, since, until),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
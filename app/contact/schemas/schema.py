@@ -1,22 +1,29 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from typing import Optional
 
+# Lengths match the contact_submissions columns, so a submission is rejected
+# here rather than by the database after a queued submission was acknowledged.
 class ContactSubmissionCreate(BaseModel):
-    company_name: Optional[str] = None
-    num_employees: Optional[str] = None
-    first_name: str
-    last_name: str
-    business_email: EmailStr
-    phone_number: Optional[str] = None
-    referral_source: Optional[str] = None
+    company_name: Optional[str] = Field(None, max_length=100)
+    num_employees: Optional[str] = Field(None, max_length=50)
+    first_name: str = Field(max_length=50)
+    last_name: str = Field(max_length=50)
+    business_email: EmailStr = Field(max_length=100)
+    phone_number: Optional[str] = Field(None, max_length=20)
+    referral_source: Optional[str] = Field(None, max_length=100)
     message: str
-    services_needed: str
-    how_did_u_hear_us:Optional[str] = None
+    services_needed: str = Field(max_length=200)
+    how_did_u_hear_us:Optional[str] = Field(None, max_length=200)
 
 class ContactSubmissionOut(ContactSubmissionCreate):
     id: int
+    reference: Optional[str] = None
     submission_date: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ContactSubmissionQueued(BaseModel):
+    reference: str
+    status: str = "queued"
@@ -0,0 +1,73 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+from fastapi import Request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+
+def table_signature(db: Session, model, *criteria) -> Tuple[int, Optional[datetime]]:
+    """(COUNT(*), MAX(updated_at)) for the rows of `model` matching `criteria`."""
+    query = db.query(func.count(model.id), func.max(model.updated_at))
+    if criteria:
+        query = query.filter(*criteria)
+    count, last_modified = query.one()
+    return count, last_modified
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    validator: tuple,
+    last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """
+    Set ETag and Last-Modified on `response` from a cheap validator (for example
+    an updated_at value or a table signature) and return a 304 response when
+    the client's cached copy is still current, otherwise None.
+    """
+    etag = make_etag(request.url.path, request.url.query, *validator)
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = bool(
+            if_modified_since and last_modified is not None
+            and _not_modified_since(if_modified_since, last_modified)
+        )
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return None
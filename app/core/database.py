@@ -1,9 +1,15 @@
+import contextvars
+import functools
 import os
 import urllib.parse
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.util import await_only
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 from app.core.base import Base
+from app.core.pool import instrument, pool_metrics, pool_options
+from app.core.schema import upgrade_schema
 
 load_dotenv()
 
@@ -13,25 +19,117 @@ MYSQL_DB = os.environ.get("MYSQL_DB", "l4it_blog")
 MYSQL_HOST = os.environ.get("MYSQL_HOST", "localhost")
 MYSQL_PORT = os.environ.get("MYSQL_PORT", "3306")
 
-DATABASE_URL = (
+DATABASE_URL = os.environ.get("DATABASE_URL") or (
     f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
 )
+# "async" serves the public read endpoints from an AsyncEngine (aiomysql, or
+# aiosqlite locally) on the event loop instead of FastAPI's threadpool.
+DB_MODE = os.environ.get("DB_MODE", "sync")
+ASYNC_DATABASE_URL = os.environ.get("ASYNC_DATABASE_URL") or (
+    f"mysql+aiomysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}:{MYSQL_PORT}/{MYSQL_DB}"
+)
+
+def _connect_args(url: str) -> dict:
+    # SQLite connections are handed between threadpool workers.
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
 
 engine = create_engine(
-    DATABASE_URL, pool_pre_ping=True
+    DATABASE_URL, connect_args=_connect_args(DATABASE_URL), **pool_options("sync")
 )
+instrument(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, connect_args=_connect_args(ASYNC_DATABASE_URL), **pool_options("async", asyncio=True)
+    )
+    instrument(async_engine.sync_engine, "async")
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def pool_stats() -> dict:
+    """Live pool state and counters for every engine, keyed by engine name."""
+    engines = {"sync": engine}
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    return {name: pool_metrics[name].snapshot(e.pool) for name, e in engines.items()}
+
 def init_db():
-    Base.metadata.create_all(bind=engine) 
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
 
 def get_db():
     """
-    Generator function that yields database sessions.
-    Ensures the session is properly closed after use.
+    Request-scoped database session. Every dependency of a request that asks
+    for get_db (the route and get_current_user alike) receives the same
+    session, so a request checks out one pooled connection at a time.
+    CRUD functions commit their own writes; whatever is still uncommitted
+    when the request fails is rolled back, and the session is always closed.
     """
     db = SessionLocal()
     try:
         yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Request-scoped AsyncSession, the async-mode counterpart of get_db."""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+
+# Session dependency for routes decorated with read_endpoint.
+get_read_db = get_async_db if DB_MODE == "async" else get_db
+
+async def dispose_engines() -> None:
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+
+# True while a read_endpoint body runs on the event loop through run_sync.
+_on_event_loop = contextvars.ContextVar("on_event_loop", default=False)
+
+def read_endpoint(route):
+    """
+    Turn a synchronous route body that takes `db: Session = Depends(get_read_db)`
+    into an async endpoint. In sync mode the body runs on the threadpool as
+    before; in async mode it runs through AsyncSession.run_sync, so the same
+    ORM queries and CRUD functions execute on the async driver without
+    occupying a worker thread. Only the SQL is asynchronous then: the rest
+    of the body runs on the event loop, so storage calls and CPU-heavy work
+    in it must go through offload().
+    """
+    @functools.wraps(route)
+    async def endpoint(*args, db, **kwargs):
+        if isinstance(db, Session):
+            return await run_in_threadpool(route, *args, db=db, **kwargs)
+
+        def body(session):
+            token = _on_event_loop.set(True)
+            try:
+                return route(*args, db=session, **kwargs)
+            finally:
+                _on_event_loop.reset(token)
+        return await db.run_sync(body)
+    return endpoint
+
+def offload(fn, *args, **kwargs):
+    """
+    Call blocking work that does not use the session (storage I/O, CPU-heavy
+    computation) from code that may run inside a read_endpoint body. On the
+    event loop it runs on the threadpool while the loop serves other
+    requests; anywhere else it is simply called.
+    """
+    if _on_event_loop.get():
+        return await_only(run_in_threadpool(fn, *args, **kwargs))
+    return fn(*args, **kwargs)
@@ -0,0 +1,36 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+
+
+class BoundedExecutor:
+    """
+    Dedicated thread pool for expensive CPU-bound calls (such as bcrypt) that
+    keeps them off FastAPI's shared threadpool. At most `max_pending` calls
+    may wait behind the running ones; beyond that callers are refused with
+    429 straight away instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, max_pending: int, name: str):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self.rejected = 0
+
+    async def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Server is busy, please try again shortly.",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
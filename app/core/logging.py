@@ -1,6 +1,10 @@
 import logging
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+import os
+import random
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
 
 logging.basicConfig(
     level=logging.INFO,
@@ -8,26 +12,85 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        logging.info(f"Request: {request.method} {request.url.path}")
+# Response bodies are only logged when explicitly enabled. The sample rate is a
+# fraction of requests (0.0 - 1.0), bodies are cut off after LOG_BODY_MAX_BYTES
+# and only the listed content types are considered.
+LOG_BODY_SAMPLE_RATE = float(os.environ.get("LOG_BODY_SAMPLE_RATE", 0))
+LOG_BODY_MAX_BYTES = int(os.environ.get("LOG_BODY_MAX_BYTES", 2048))
+LOG_BODY_CONTENT_TYPES = tuple(
+    t.strip()
+    for t in os.environ.get("LOG_BODY_CONTENT_TYPES", "application/json,text/plain").split(",")
+    if t.strip()
+)
+
+
+class LoggingMiddleware:
+    """
+    Pure ASGI request logging middleware.
+    Response chunks are passed straight through to the client, so streaming
+    responses and static files are never buffered in memory.
+    """
+
+    def __init__(
+        self,
+        app,
+        sample_rate: float = LOG_BODY_SAMPLE_RATE,
+        max_body_bytes: int = LOG_BODY_MAX_BYTES,
+        content_types: tuple = LOG_BODY_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+        self.content_types = content_types
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path = scope["path"]
+        start = time.perf_counter()
+        status_code = 500
+        byte_count = 0
+        capture = self.sample_rate > 0 and random.random() < self.sample_rate
+        body_preview = bytearray()
+
+        logging.info(f"Request: {method} {path}")
+
+        async def send_wrapper(message):
+            nonlocal status_code, byte_count, capture
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if capture:
+                    content_type = ""
+                    for key, value in message.get("headers", []):
+                        if key.lower() == b"content-type":
+                            content_type = value.decode("latin-1")
+                            break
+                    capture = content_type.startswith(self.content_types)
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                byte_count += len(chunk)
+                if capture and len(body_preview) < self.max_body_bytes:
+                    body_preview.extend(chunk[: self.max_body_bytes - len(body_preview)])
+            await send(message)
+
         try:
-            response = await call_next(request)
-            # Read response body for logging
-            response_body = b""
-            async for chunk in response.body_iterator:
-                response_body += chunk
-            logging.info(
-                f"Response: {request.method} {request.url.path} "
-                f"Status: {response.status_code} "
-                f"Body: {response_body.decode('utf-8', errors='replace')}"
-            )
-            return Response(
-                content=response_body,
-                status_code=response.status_code,
-                headers=dict(response.headers),
-                media_type=response.media_type
-            )
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            logging.error(f"Error handling request: {e}")
-            raise 
\ No newline at end of file
+            logging.error(f"Error handling request: {method} {path}: {e}")
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            message = (
+                f"Response: {method} {path} "
+                f"Status: {status_code} "
+                f"Bytes: {byte_count} "
+                f"Time: {elapsed_ms:.1f}ms"
+            )
+            if capture:
+                message += f" Body: {body_preview.decode('utf-8', errors='replace')}"
+                if byte_count > len(body_preview):
+                    message += "...(truncated)"
+            logging.info(message)
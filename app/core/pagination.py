@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+from typing import Generic, List, Optional, Tuple, TypeVar
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import and_, or_
+
+T = TypeVar("T")
+
+
+class CursorPage(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat() if created_at is not None else None, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at) if created_at is not None else None, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(query, created_col, id_col, cursor: Optional[str], limit: int):
+    """
+    Return one page of `query` ordered newest first on (created_col, id_col),
+    together with the cursor for the following page (None on the last page).
+    An empty cursor starts from the most recent row. If created_col is
+    nullable, rows without a value come last, as MySQL and SQLite sort NULL
+    below every value; their cursors carry no timestamp.
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        if created_at is None:
+            query = query.filter(created_col.is_(None), id_col < last_id)
+        else:
+            after = [created_col < created_at, and_(created_col == created_at, id_col < last_id)]
+            if created_col.nullable:
+                after.append(created_col.is_(None))
+            query = query.filter(or_(*after))
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return rows, next_cursor
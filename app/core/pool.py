@@ -0,0 +1,145 @@
+import bisect
+import os
+import threading
+import time
+from typing import Dict
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+# Pre-ping costs a round-trip per checkout. The cheaper alternative is to turn
+# it off and recycle connections before the server's wait_timeout instead,
+# e.g. DB_POOL_PRE_PING=false and DB_POOL_RECYCLE=280.
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", -1))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_USE_LIFO = os.environ.get("DB_POOL_USE_LIFO", "false").lower() in ("1", "true", "yes")
+
+# Upper bounds (milliseconds) of the checkout wait-time histogram buckets.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Counters and a checkout wait-time histogram for one engine's pool, fed by pool events."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+
+    def record(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def observe_wait(self, seconds: float) -> None:
+        wait_ms = seconds * 1000
+        with self._lock:
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            waits = sum(self.wait_buckets)
+            labels = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + ["inf"]
+            return {
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else self.checkouts - self.checkins,
+                "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else None,
+                "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "churn": {
+                    "connects": self.connects,
+                    "closes": self.closes,
+                    "invalidations": self.invalidations,
+                },
+                "wait_ms": {
+                    "count": waits,
+                    "mean": self.wait_total_ms / waits if waits else 0.0,
+                    "max": self.wait_max_ms,
+                    "histogram": dict(zip(labels, self.wait_buckets)),
+                },
+            }
+
+
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+class _TimedGetMixin:
+    """Times how long each checkout waits for a connection, including timeouts."""
+
+    def _do_get(self):
+        metrics = pool_metrics.get(self._orig_logging_name)
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if metrics is not None:
+                metrics.record("timeouts")
+            raise
+        finally:
+            if metrics is not None:
+                metrics.observe_wait(time.perf_counter() - start)
+
+
+class TimedQueuePool(_TimedGetMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedGetMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(name: str, asyncio: bool = False) -> dict:
+    """create_engine keyword arguments for an instrumented pool named `name`."""
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if asyncio else TimedQueuePool,
+        "pool_logging_name": name,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_use_lifo": DB_POOL_USE_LIFO,
+    }
+
+
+def instrument(engine, name: str) -> PoolMetrics:
+    """Register pool event listeners on a sync engine and return its metrics."""
+    metrics = pool_metrics.setdefault(name, PoolMetrics(name))
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.record("connects")
+
+    @event.listens_for(engine, "close")
+    def on_close(dbapi_connection, connection_record):
+        metrics.record("closes")
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.record("invalidations")
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.record("checkouts")
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.record("checkins")
+
+    return metrics
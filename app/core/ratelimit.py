@@ -0,0 +1,44 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+from fastapi import HTTPException
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets holding up to `burst` tokens and refilled at `rate`
+    tokens per second. Buckets of the least recently seen keys are dropped
+    once `maxsize` keys are tracked, which only ever makes a key less limited.
+    """
+
+    def __init__(self, rate: float, burst: float, maxsize: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[Hashable, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token for `key`. Returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / self.rate if self.rate > 0 else float("inf")
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def check(self, key: Hashable, detail: str = "Too many requests, please try again later.") -> None:
+        """acquire() that raises 429 with a Retry-After header when `key` is out of tokens."""
+        wait = self.acquire(key)
+        if wait:
+            retry_after = str(math.ceil(wait)) if math.isfinite(wait) else "60"
+            raise HTTPException(status_code=429, detail=detail, headers={"Retry-After": retry_after})
@@ -0,0 +1,86 @@
+"""
+Bring an existing database up to the current models. create_all() only
+creates missing tables, so when init_db() runs at startup:
+
+- columns added to a table that already exists, listed in ADDED_COLUMNS,
+  are added (they must be nullable);
+- every index declared on a model that an existing table lacks is created.
+"""
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+from app.core.base import Base
+
+# "table.column" for every column added after its table was first released.
+ADDED_COLUMNS = (
+    "contact_submissions.reference",
+    "media_files.variants",
+)
+
+
+def _has_column(engine, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(engine).get_columns(table)}
+
+
+def _index_names(engine, table: str) -> set:
+    inspector = inspect(engine)
+    names = {index["name"] for index in inspector.get_indexes(table)}
+    return names | {constraint["name"] for constraint in inspector.get_unique_constraints(table)}
+
+
+def _add_column(engine, column) -> None:
+    table = column.table
+    preparer = engine.dialect.identifier_preparer
+    ddl = (
+        f"ALTER TABLE {preparer.format_table(table)} "
+        f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=engine.dialect)} NULL"
+    )
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(ddl))
+    except DBAPIError:
+        # Another worker starting at the same time may have added it first.
+        if not _has_column(engine, table.name, column.name):
+            raise
+        return
+    logging.info(f"Schema: added {table.name}.{column.name}")
+
+
+def _create_index(engine, index) -> None:
+    try:
+        index.create(bind=engine)
+    except DBAPIError:
+        # Another worker starting at the same time may have created it first.
+        if index.name not in _index_names(engine, index.table.name):
+            raise
+        return
+    logging.info(f"Schema: created index {index.name}")
+
+
+def missing_indexes(engine) -> list:
+    """Indexes declared on the models that their existing tables lack."""
+    inspector = inspect(engine)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = _index_names(engine, table.name)
+        missing.extend(index for index in table.indexes if index.name not in existing)
+    return missing
+
+
+def upgrade_schema(engine) -> None:
+    """Add the columns in ADDED_COLUMNS and the indexes that existing tables are missing."""
+    inspector = inspect(engine)
+    for name in ADDED_COLUMNS:
+        table_name, column_name = name.split(".")
+        table = Base.metadata.tables.get(table_name)
+        if table is None or not inspector.has_table(table_name) or _has_column(engine, table_name, column_name):
+            continue
+        column = table.columns[column_name]
+        if not column.nullable:
+            raise RuntimeError(f"Schema: {name} must be nullable to be added to an existing table")
+        _add_column(engine, column)
+    for index in missing_indexes(engine):
+        _create_index(engine, index)
+
@@ -0,0 +1,230 @@
+import html
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session, load_only
+from app.core.conditional import table_signature
+from app.core.database import offload
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+TAG_RE = re.compile(r"<[^>]+>")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "to", "was", "with",
+}
+
+
+def strip_html(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    return html.unescape(TAG_RE.sub(" ", text))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def make_snippet(text: str, terms: Iterable[str], width: int = 160) -> str:
+    text = " ".join(text.split())
+    lowered = text.lower()
+    positions = []
+    for term in terms:
+        match = re.search(rf"\b{re.escape(term)}", lowered)
+        if match:
+            positions.append(match.start())
+    start = max(min(positions) - width // 4, 0) if positions else 0
+    snippet = text[start:start + width]
+    if start > 0:
+        snippet = "..." + snippet
+    if start + width < len(text):
+        snippet += "..."
+    return snippet
+
+
+class InvertedIndex:
+    """
+    In-memory BM25 index. Documents are a mapping of field name to text, and
+    each field's term frequencies are multiplied by its weight.
+    """
+
+    def __init__(self, weights: Dict[str, int], k1: float = 1.2, b: float = 0.75):
+        self.weights = weights
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.doc_terms: Dict[int, Counter] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+        self._lock = threading.RLock()
+
+    def add(self, doc_id: int, fields: Dict[str, Optional[str]]) -> None:
+        terms = Counter()
+        for name, weight in self.weights.items():
+            for token in tokenize(fields.get(name)):
+                terms[token] += weight
+        with self._lock:
+            self.remove(doc_id)
+            for token, tf in terms.items():
+                self.postings[token][doc_id] = tf
+            self.doc_terms[doc_id] = terms
+            length = sum(terms.values())
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            terms = self.doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            for token in terms:
+                docs = self.postings.get(token)
+                if docs is not None:
+                    docs.pop(doc_id, None)
+                    if not docs:
+                        del self.postings[token]
+            self.total_length -= self.doc_lengths.pop(doc_id, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.postings.clear()
+            self.doc_terms.clear()
+            self.doc_lengths.clear()
+            self.total_length = 0
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        with self._lock:
+            n = len(self.doc_lengths)
+            if n == 0:
+                return []
+            avg_length = self.total_length / n or 1
+            scores: Dict[int, float] = defaultdict(float)
+            for token in set(tokenize(query)):
+                docs = self.postings.get(token)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, tf in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:limit]
+
+
+class ModelSearch:
+    """
+    Binds an InvertedIndex to a SQLAlchemy model. The index is built lazily on
+    the first search and rebuilt whenever the table's (COUNT, MAX(updated_at))
+    signature no longer matches, so rows written by other worker processes are
+    picked up. Writes made through this process update it incrementally.
+    A rebuild fills a new index and swaps it in, so searches keep using the
+    complete old one meanwhile, and concurrent searches share one rebuild.
+    """
+
+    def __init__(self, model, weights: Dict[str, int], batch_size: int = 1000):
+        self.model = model
+        self.weights = weights
+        self.index = InvertedIndex(weights)
+        self.batch_size = batch_size
+        self.signature = None
+        self.rebuilds = 0
+        self._lock = threading.Lock()
+
+    def _fields(self, row) -> Dict[str, str]:
+        return {name: strip_html(getattr(row, name)) for name in self.weights}
+
+    def _signature(self, db: Session):
+        return table_signature(db, self.model)
+
+    def _acquire(self) -> None:
+        # Never block the event loop on the lock (async mode): the request
+        # holding it may itself be waiting for the loop.
+        if not self._lock.acquire(blocking=False):
+            offload(self._lock.acquire)
+
+    def rebuild(self, db: Session, signature=None) -> None:
+        """
+        Build a fresh index and swap it in. `signature` is the table signature
+        the caller observed; it is taken here otherwise. Either way it predates
+        the scan, so a write made during the scan triggers another rebuild.
+        """
+        self._acquire()
+        try:
+            self._rebuild(db, signature if signature is not None else self._signature(db))
+        finally:
+            self._lock.release()
+
+    def _rebuild(self, db: Session, signature) -> None:
+        columns = [getattr(self.model, name) for name in ("id", *self.weights)]
+        index = InvertedIndex(self.weights)
+        query = db.query(self.model).options(load_only(*columns)).yield_per(self.batch_size)
+        batch = []
+        for row in query:
+            batch.append((row.id, {name: getattr(row, name) for name in self.weights}))
+            if len(batch) >= self.batch_size:
+                offload(self._add_batch, index, batch)
+                batch = []
+        offload(self._add_batch, index, batch)
+        self.index = index
+        self.signature = signature
+        self.rebuilds += 1
+
+    @staticmethod
+    def _add_batch(index: InvertedIndex, batch) -> None:
+        for doc_id, fields in batch:
+            index.add(doc_id, {name: strip_html(value) for name, value in fields.items()})
+
+    def ensure_fresh(self, db: Session) -> None:
+        signature = self._signature(db)
+        if self.signature == signature:
+            return
+        self._acquire()
+        try:
+            # Another request may have rebuilt while this one waited for the lock.
+            if self.signature != signature:
+                self._rebuild(db, signature)
+        finally:
+            self._lock.release()
+
+    def _advance(self, db: Session, expected) -> None:
+        """
+        Move the stored signature past a write made through this process, but
+        only if the table now looks exactly as it did at the last rebuild plus
+        that write. Otherwise another worker has written too, and the stored
+        signature is left stale so ensure_fresh picks up its rows.
+        """
+        if self.signature is None:
+            return
+        signature = self._signature(db)
+        if expected(*self.signature, *signature):
+            self.signature = signature
+
+    def index_row(self, db: Session, row) -> None:
+        inserted = row.id not in self.index.doc_lengths
+        updated_at = row.updated_at
+        self.index.add(row.id, self._fields(row))
+        self._advance(db, lambda count, last, new_count, new_last: (
+            new_count == count + inserted and new_last == (updated_at if last is None else max(last, updated_at))
+        ))
+
+    def remove_row(self, db: Session, row_id: int) -> None:
+        self.index.remove(row_id)
+        self._advance(db, lambda count, last, new_count, new_last: (
+            new_count == count - 1 and (new_last is None or (last is not None and new_last <= last))
+        ))
+
+    def search(self, db: Session, query: str, limit: int = 10, snippet_field: str = "content"):
+        """Return (row, score, snippet) tuples, best match first."""
+        self.ensure_fresh(db)
+        ranked = offload(self.index.search, query, limit)
+        if not ranked:
+            return []
+        rows = {
+            row.id: row
+            for row in db.query(self.model).filter(self.model.id.in_([doc_id for doc_id, _ in ranked]))
+        }
+        hits = [(rows[doc_id], score) for doc_id, score in ranked if doc_id in rows]
+        texts = [getattr(row, snippet_field) for row, _ in hits]
+        terms = tokenize(query)
+        snippets = offload(lambda: [make_snippet(strip_html(text), terms) for text in texts])
+        return [(row, score, snippet) for (row, score), snippet in zip(hits, snippets)]
@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+from app.media.storage import storage
+
+load_dotenv()
+
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 20 * 1024 * 1024))
+
+CONTENT_TYPE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+
+@dataclass
+class SavedUpload:
+    path: str
+    sha256: str
+    size: int
+    seconds: float
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.size / self.seconds if self.seconds else float(self.size)
+
+
+def content_path(directory: str, sha256: str, ext: str) -> str:
+    """Sharded location of a content-addressed file: <dir>/ab/cd/abcd...<ext>."""
+    return os.path.join(directory, sha256[:2], sha256[2:4], f"{sha256}{ext}")
+
+
+def _copy_to_disk(source, directory: str, ext: str, max_bytes: int):
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large. Maximum size is {max_bytes} bytes.",
+                    )
+                digest.update(chunk)
+                buffer.write(chunk)
+        sha256 = digest.hexdigest()
+        destination = content_path(directory, sha256, ext)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        # Identical bytes land on the same path, so replacing an existing copy
+        # is harmless and keeps the file present for the new reference.
+        os.replace(tmp_path, destination)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return destination, sha256, size
+
+
+async def save_upload(
+    upload: UploadFile,
+    directory: str,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+) -> SavedUpload:
+    """
+    Stream an UploadFile into `directory` in fixed-size chunks on a worker
+    thread, so the event loop is never blocked on disk I/O. The SHA-256 is
+    computed while streaming and the temp file is renamed atomically to its
+    content-addressed path, so identical uploads are stored once. Uploads
+    larger than `max_bytes` are rejected with 413 while streaming. The file
+    is staged under the storage backend's local root and then published to it.
+    """
+    ext = CONTENT_TYPE_EXTENSIONS.get(upload.content_type)
+    if ext is None:
+        ext = os.path.splitext(os.path.basename(upload.filename or ""))[1].lower()
+    start = time.perf_counter()
+    await upload.seek(0)
+    _, sha256, size = await run_in_threadpool(
+        _copy_to_disk, upload.file, storage.local_path(directory), ext, max_bytes
+    )
+    path = f"/{content_path(directory, sha256, ext).replace(os.sep, '/')}"
+    await run_in_threadpool(storage.publish, path, upload.content_type)
+    saved = SavedUpload(
+        path=path,
+        sha256=sha256,
+        size=size,
+        seconds=time.perf_counter() - start,
+    )
+    logging.info(
+        f"Upload: {saved.path} {saved.size} bytes in {saved.seconds * 1000:.1f}ms "
+        f"({saved.bytes_per_second / 1024:.0f} KiB/s)"
+    )
+    return saved
@@ -1,8 +1,14 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload
+from app.core.pagination import keyset_page
 from app.images.model.images import Image
 from app.images.schemas.images import ImageCreate, ImageUpdate
-from typing import List, Optional
-import os
+from typing import List, Optional, Tuple
+from app.media.crud import release_reference
+from app.media.storage import storage
+
+# Relationships every image response needs, loaded in the same query.
+READ_OPTIONS = (joinedload(Image.author), joinedload(Image.image_meta))
 
 def create_img(db: Session, images: ImageCreate) -> Image:
     db_image = Image(**images.dict())
@@ -12,14 +18,40 @@ def create_img(db: Session, images: ImageCreate) -> Image:
 
     return db_image
 
+def create_imgs(db: Session, images: List[ImageCreate]) -> List[Image]:
+    """
+    Insert many images with a single multi-row INSERT and return them in the
+    order given. MySQL cannot return generated ids from a multi-row insert,
+    so the new rows are read back as the newest rows for those paths.
+    """
+    if not images:
+        return []
+    db.execute(insert(Image), [image.model_dump() for image in images])
+    db.commit()
+    user_ids = {image.user_id for image in images}
+    rows = (
+        db.query(Image).options(*READ_OPTIONS)
+        .filter(Image.user_id.in_(user_ids), Image.image.in_({image.image for image in images}))
+        .order_by(Image.id.desc())
+        .limit(len(images))
+        .all()
+    )
+    by_key = {}
+    for row in reversed(rows):
+        by_key.setdefault((row.user_id, row.image), []).append(row)
+    return [by_key[(image.user_id, image.image)].pop(0) for image in images]
+
 def get_img(db: Session, img_id: int) -> Optional[Image]:
-    return db.query(Image).filter(Image.id == img_id).first()
+    return db.query(Image).options(*READ_OPTIONS).filter(Image.id == img_id).first()
+
+def get_images(db: Session, skip: int = 0, limit: int = 10) -> List[Image]:
+    return db.query(Image).options(*READ_OPTIONS).offset(skip).limit(limit).all()
 
-# def get_images(db: Session, skip: int = 0, limit: int = 10) -> List[Image]:
-#     return db.query(Image).offset(skip).limit(limit).all()
+def get_images_page(db: Session, cursor: Optional[str] = None, limit: int = 10) -> Tuple[List[Image], Optional[str]]:
+    return keyset_page(db.query(Image).options(*READ_OPTIONS), Image.created_at, Image.id, cursor, limit)
 
 def get_img_by_user(db: Session, user_id: int) -> List[Image]:
-    return db.query(Image).filter(Image.user_id == user_id).all()
+    return db.query(Image).options(*READ_OPTIONS).filter(Image.user_id == user_id).all()
 
 def update_img(db: Session, img_id: int, image: ImageUpdate) -> Optional[Image]:
     db_img = db.query(Image).filter(Image.id == img_id).first()
@@ -36,12 +68,13 @@ def delete_img(db: Session, img_id: int) -> bool:
     if not db_img:
         return False
     
-    if db_img.image:
-        file_path = os.path.join(os.getcwd(), db_img.image.lstrip("/"))
-
-        if os.path.exists(file_path):
-            os.remove(file_path)
-
+    image_path = db_img.image
     db.delete(db_img)
     db.commit()
+
+    # Content-addressed uploads are shared, so only drop this row's reference;
+    # files stored before deduplication are still removed directly.
+    if image_path and not release_reference(db, image_path):
+        storage.delete(image_path)
+
     return True             
\ No newline at end of file
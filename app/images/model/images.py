@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func, Index
+from sqlalchemy.orm import relationship
+from app.auth.models.user import User
 from app.core.base import Base
+from app.media.models.media import MediaFile
 
 class Image(Base):
     __tablename__ = "images"
+    __table_args__ = (Index("ix_images_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -10,3 +14,6 @@ class Image(Base):
     imagename = Column(String(255), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    author = relationship(User)
+    image_meta = relationship(MediaFile, primaryjoin="foreign(Image.image) == MediaFile.path", viewonly=True)
@@ -1,38 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
-from app.core.database import SessionLocal
-from app.images.schemas.images import ImageCreate, ImageUpdate, ImageOut
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional, Union
+from app.core.database import get_db, get_read_db, read_endpoint
+from app.core.conditional import conditional_response, table_signature
+from app.core.pagination import CursorPage
+from app.images.schemas.images import ImageCreate, ImageOut, ImageBatchItem
 import os
-import shutil
-from app.images.crud import create_img,get_img,update_img,delete_img,get_img_by_user
+import uuid
+from app.images.crud import create_img,create_imgs,get_img,get_images,get_images_page,delete_img,get_img_by_user
 from app.auth.dependencies import get_current_user
-from app.auth.models.user import User
-from fastapi.responses import JSONResponse
+from app.auth.principal import Principal
+from fastapi.responses import JSONResponse, FileResponse
+from starlette.concurrency import run_in_threadpool
 from app.images.model.images import Image
-from datetime import datetime
+from app.media.crud import store_upload, store_uploads, register_stored, add_reference, add_references
+from app.core.uploads import CONTENT_TYPE_EXTENSIONS, MAX_UPLOAD_BYTES
+from app.media.storage import storage
+from app.media.variants import PILImage, variant_srcset
+from app.media.models.media import MediaFile
+from app.media.schemas.media import MediaMeta
+from app.media.render import MAX_RENDER_DIMENSION, RENDER_FORMATS, render_cache
 
 
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
 UPLOAD_DIR = "static/uploadedimages"
-BASE_URL = "https://l4it.net/api/"
+IMAGE_BATCH_MAX_FILES = int(os.environ.get("IMAGE_BATCH_MAX_FILES", 200))
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def to_image_out(img: Image) -> ImageOut:
+    img_dict = img.__dict__.copy()
+    img_dict["author_email"] = img.author.email if img.author else None
+    img_dict["srcset"] = variant_srcset(img.image, img.image_meta)
+    img_dict["image_meta"] = MediaMeta.model_validate(img.image_meta) if img.image_meta else None
+    if img_dict.get("image"):
+        img_dict["image"] = storage.url(img_dict["image"])
+    return ImageOut(**img_dict)
 
 @router.post("/", response_model=ImageOut, status_code=status.HTTP_201_CREATED)
 async def create(
    
     image: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
    
     image_path = None
@@ -41,13 +52,7 @@ async def create(
             raise HTTPException(status_code=400, detail="Invalid image format. Allowed: jpg, png, gif, webp")
         
         original_name = image.filename
-        _, ext = os.path.splitext(original_name)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        new_filename = f"{current_user.id}_{timestamp}{ext}"
-        file_location = os.path.join(UPLOAD_DIR, new_filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        image_path = f"/{file_location.replace(os.sep, '/')}"
+        image_path = await store_upload(db, image, UPLOAD_DIR)
 
 
     image_data = ImageCreate(
@@ -55,21 +60,104 @@ async def create(
         user_id=current_user.id,
         imagename=original_name
     )
-    return create_img(db, image_data)
+    created = create_img(db, image_data)
+    add_reference(db, created.image)
+    return created
  
-@router.get("/", response_model=List[ImageOut])
-def read_img(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    img = db.query(Image).offset(skip).limit(limit).all()
-    result = []
-    for imgs in img:
-        user = db.query(User).filter(User.id == imgs.user_id).first()
-        author_email = user.email if user else None
-        img_dict = imgs.__dict__.copy()
-        img_dict["author_email"] = author_email
-        if img_dict.get("image"):
-            img_dict["image"] = f"{BASE_URL.rstrip('/')}/{img_dict['image'].lstrip('/')}"
-        result.append(ImageOut(**img_dict))
-    return result
+@router.post("/batch", response_model=List[ImageBatchItem])
+async def create_batch(
+    images: List[UploadFile] = File(...),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Upload many images at once. Files are stored concurrently and all rows
+    are inserted together; each file gets its own result, so a rejected file
+    does not fail the rest of the batch.
+    """
+    if len(images) > IMAGE_BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many files. Maximum is {IMAGE_BATCH_MAX_FILES} per batch.")
+    results = [ImageBatchItem(filename=image.filename, status="pending") for image in images]
+    accepted = []
+    for index, image in enumerate(images):
+        if image.content_type not in ALLOWED_IMAGE_TYPES:
+            results[index].status = "error"
+            results[index].detail = "Invalid image format. Allowed: jpg, png, gif, webp"
+        else:
+            accepted.append(index)
+
+    stored = await store_uploads(db, [images[index] for index in accepted], UPLOAD_DIR)
+    to_create = []
+    for index, outcome in zip(accepted, stored):
+        if isinstance(outcome, BaseException):
+            results[index].status = "error"
+            results[index].detail = outcome.detail if isinstance(outcome, HTTPException) else "Upload failed."
+        else:
+            to_create.append((index, ImageCreate(image=outcome, user_id=current_user.id, imagename=images[index].filename)))
+
+    created = create_imgs(db, [image_data for _, image_data in to_create])
+    # Serialize before add_references commits, which expires the loaded rows.
+    for (index, _), img in zip(to_create, created):
+        results[index].status = "created"
+        results[index].image = to_image_out(img)
+    add_references(db, [img.image for img in created])
+    return results
+
+@router.post("/presign")
+def presign_upload(
+    content_type: str = Form(...),
+    current_user: Principal = Depends(get_current_user),
+):
+    """
+    Form target for uploading an image straight to the storage backend. Post
+    the file there, then register it with POST /img/presigned.
+    """
+    if content_type not in ALLOWED_IMAGE_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid image format. Allowed: jpg, png, gif, webp")
+    path = f"/{UPLOAD_DIR}/direct/{uuid.uuid4().hex}{CONTENT_TYPE_EXTENSIONS[content_type]}"
+    upload = storage.presigned_upload(path, content_type, MAX_UPLOAD_BYTES)
+    if upload is None:
+        raise HTTPException(status_code=501, detail="Direct uploads are not supported by this storage backend.")
+    return {"path": path, "upload": upload}
+
+@router.post("/presigned", response_model=ImageOut, status_code=status.HTTP_201_CREATED)
+async def create_presigned(
+    path: str = Form(...),
+    imagename: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    if not path.startswith(f"/{UPLOAD_DIR}/direct/") or ".." in path:
+        raise HTTPException(status_code=400, detail="Invalid upload path.")
+    image_path = await register_stored(db, path, ALLOWED_IMAGE_TYPES)
+    image_data = ImageCreate(
+        image=image_path,
+        user_id=current_user.id,
+        imagename=imagename or os.path.basename(path)
+    )
+    created = create_img(db, image_data)
+    add_reference(db, created.image)
+    return created
+
+@router.get("/", response_model=Union[List[ImageOut], CursorPage[ImageOut]])
+@read_endpoint
+def read_img(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    count, last_modified = table_signature(db, Image)
+    not_modified = conditional_response(request, response, (count, last_modified), last_modified)
+    if not_modified:
+        return not_modified
+    if cursor is not None:
+        img, next_cursor = get_images_page(db, cursor=cursor, limit=limit)
+        return CursorPage[ImageOut](items=[to_image_out(imgs) for imgs in img], next_cursor=next_cursor)
+    img = get_images(db, skip=skip, limit=limit)
+    return [to_image_out(imgs) for imgs in img]
 
 
 
@@ -79,7 +167,7 @@ def read_img(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
 #     image: Optional[UploadFile] = File(None),
 #     image_path: Optional[str] = Form(None),  # Add this to preserve existing image
 #     db: Session = Depends(get_db),
-#     current_user: User = Depends(get_current_user),
+#     current_user: Principal = Depends(get_current_user),
 # ):
     
 #     img = get_img(db, img_id)
@@ -116,24 +204,62 @@ def read_img(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
 #     return updated
 
 
+@router.get("/render/{img_id}")
+async def render_img(
+    img_id: int,
+    w: Optional[int] = Query(None, ge=1, le=MAX_RENDER_DIMENSION),
+    h: Optional[int] = Query(None, ge=1, le=MAX_RENDER_DIMENSION),
+    fmt: str = Query("webp", pattern="^(webp|jpeg|jpg|png)$"),
+    q: int = Query(80, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    if PILImage is None:
+        raise HTTPException(status_code=503, detail="Image rendering is not available.")
+    image_path = await run_in_threadpool(
+        lambda: db.query(Image.image).filter(Image.id == img_id).scalar()
+    )
+    if not image_path:
+        raise HTTPException(status_code=404, detail="images not found")
+    try:
+        source = await run_in_threadpool(storage.fetch, image_path)
+        stat = os.stat(source)
+    except Exception:
+        raise HTTPException(status_code=404, detail="images not found")
+    source_key = f"{image_path}|{stat.st_size}|{stat.st_mtime_ns}"
+    try:
+        rendered = await render_cache.get(source_key, source, w, h, fmt, q)
+    except Exception:
+        raise HTTPException(status_code=422, detail="Image could not be rendered.")
+    return FileResponse(
+        rendered,
+        media_type=RENDER_FORMATS[fmt][1],
+        headers={"Cache-Control": "public, max-age=86400"},
+    )
+
 @router.get("/id/{img_id}", response_model=ImageOut)
-def read_img_by_id(img_id: int, db: Session = Depends(get_db)):
+@read_endpoint
+def read_img_by_id(img_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    row = (
+        db.query(Image.updated_at, Image.image, MediaFile.variants)
+        .outerjoin(MediaFile, MediaFile.path == Image.image)
+        .filter(Image.id == img_id)
+        .first()
+    )
+    if row is None:
+        raise HTTPException(status_code=404, detail="images not found")
+    # Variants appear after upload, so they are part of the validator.
+    validator = (row.updated_at, variant_srcset(row.image, row))
+    not_modified = conditional_response(request, response, validator, row.updated_at)
+    if not_modified:
+        return not_modified
     img = get_img(db, img_id)
     if not img:
         raise HTTPException(status_code=404, detail="images not found")
-    user = db.query(User).filter(User.id == img.user_id).first()
-    author_email = user.email if user else None
-    img_dict = img.__dict__.copy()
-    img_dict["author_email"] = author_email
-    if img_dict.get("image"):
-        img_dict["image"] = f"{BASE_URL.rstrip('/')}/{img_dict['image'].lstrip('/')}"
-        
-    
-    return ImageOut(**img_dict)
+    return to_image_out(img)
 
 
 @router.post("/delete/{img_id}", status_code=status.HTTP_200_OK)
-def delete(img_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def delete(img_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     img = get_img(db, img_id)
     if not img:
         raise HTTPException(status_code=404, detail="Image not found")
@@ -143,7 +269,7 @@ def delete(img_id: int, db: Session = Depends(get_db), current_user: User = Depe
     return JSONResponse(content={"detail": "Image deleted successfully."}, status_code=200)
 
 @router.get("/user/{user_id}", response_model=List[ImageOut])
-def get_img_by_user_route(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_img_by_user_route(user_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     if user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view these Images.")
     return get_img_by_user(db, user_id) 
\ No newline at end of file
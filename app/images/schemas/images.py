@@ -1,6 +1,7 @@
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Dict, Optional
+from app.media.schemas.media import MediaMeta
 
 class ImageBase(BaseModel):
     image: Optional[str] = None
@@ -16,7 +17,15 @@ class ImageOut(ImageBase):
     id: int
     user_id: int
     author_email: Optional[str] = None
+    srcset: Optional[Dict[str, str]] = None
+    image_meta: Optional[MediaMeta] = None
     created_at: datetime
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+class ImageBatchItem(BaseModel):
+    filename: Optional[str] = None
+    status: str
+    detail: Optional[str] = None
+    image: Optional[ImageOut] = None
@@ -1,18 +1,26 @@
+import asyncio
 import os
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import init_db
+from app.core.database import init_db, dispose_engines
+from app.auth.auth import password_executor
+from app.auth.revocation import revocations, run_revocation_sync
+from app.media.variants import shutdown_process_pools
+from app.media.static import MediaFiles
+from app.media.gc import MEDIA_GC_INTERVAL_SECONDS, run_periodically as run_media_gc
 from app.auth.routes import user as user_routes
 from app.blog.routes import blog as blog_routes
 from app.services.routes.mspservices import router as msp_services_routes
 from app.whatwedo.routes.info import router as info_routes
 from app.contact.routes.routes import router as contact_router
+from app.contact.ingest import CONTACT_INGEST_MODE, contact_queue
 from app.casestudy.routes.route import router as case_study_routes
 from app.core.logging import LoggingMiddleware
 from app.images.routes import images as img_routes
+from app.routes.internal import router as internal_routes
 
 load_dotenv()
 
@@ -22,7 +30,23 @@ APP_PORT = int(os.environ["APP_PORT"])
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    revocations.load()
+    revocation_task = asyncio.create_task(run_revocation_sync())
+    gc_task = asyncio.create_task(run_media_gc()) if MEDIA_GC_INTERVAL_SECONDS > 0 else None
+    contact_task = None
+    if CONTACT_INGEST_MODE == "queued":
+        contact_queue.recover()
+        contact_task = asyncio.create_task(contact_queue.run())
     yield
+    revocation_task.cancel()
+    if gc_task is not None:
+        gc_task.cancel()
+    if contact_task is not None:
+        contact_task.cancel()
+        await asyncio.gather(contact_task, return_exceptions=True)
+    shutdown_process_pools()
+    password_executor.shutdown()
+    await dispose_engines()
 
 app = FastAPI(lifespan=lifespan)
 # app = FastAPI(lifespan=lifespan, root_path="/api")
@@ -48,7 +72,12 @@ app.include_router(info_routes, prefix="/info", tags=["info"])
 app.include_router(contact_router, prefix="/contact", tags=["contact"])
 app.include_router(case_study_routes, prefix="/case-studies", tags=["case-studies"])
 app.include_router(img_routes.router, prefix="/img", tags=["img"])
+app.include_router(internal_routes, prefix="/internal", tags=["internal"])
 
+# Uploads are served by MediaFiles (ranges, stat-based ETags, immutable caching
+# for content-addressed names); these mounts must precede the generic one.
+app.mount("/static/uploads", MediaFiles(directory="static/uploads"), name="uploads")
+app.mount("/static/uploadedimages", MediaFiles(directory="static/uploadedimages"), name="uploadedimages")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 app.add_middleware(
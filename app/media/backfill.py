@@ -0,0 +1,101 @@
+"""
+Record metadata and generated variants for uploads that predate
+media_files tracking, metadata extraction or variant recording. Run from
+the project root:
+
+    python -m app.media.backfill [--batch-size 100] [--workers 4]
+"""
+import argparse
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from app.core.database import SessionLocal
+from app.media.metadata import extract_metadata
+from app.media.models.media import MediaFile
+from app.media.references import referenced_paths
+from app.media.storage import storage
+from app.media.variants import PILImage, generate_variants, record_variants
+
+
+def _pending(db, references: Counter):
+    """Paths that exist on disk and have no media_files row or no metadata yet."""
+    complete = {
+        path for (path,) in db.query(MediaFile.path).filter(MediaFile.mime_type.isnot(None))
+    }
+    for path in sorted(references):
+        if path in complete:
+            continue
+        if not storage.exists(path):
+            logging.warning(f"Backfill: {path} is referenced but missing on disk")
+            continue
+        yield path
+
+
+def _save(db, path: str, metadata: dict, ref_count: int) -> bool:
+    media = db.query(MediaFile).filter(MediaFile.path == path).first()
+    created = media is None
+    if created:
+        media = MediaFile(path=path, ref_count=ref_count)
+        db.add(media)
+    for key, value in metadata.items():
+        setattr(media, key, value)
+    return created
+
+
+def backfill(batch_size: int = 100, workers: int = os.cpu_count() or 1) -> None:
+    db = SessionLocal()
+    try:
+        references = referenced_paths(db)
+        paths = list(_pending(db, references))
+        logging.info(f"Backfill: {len(paths)} of {len(references)} referenced file(s) need metadata")
+        processed = created = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, len(paths), batch_size):
+                batch = paths[start:start + batch_size]
+                results = executor.map(
+                    extract_metadata, [storage.fetch(path) for path in batch], [True] * len(batch)
+                )
+                for path, metadata in zip(batch, results):
+                    created += _save(db, path, metadata, references[path])
+                db.commit()
+                processed += len(batch)
+                logging.info(f"Backfill: {processed}/{len(paths)} done, {created} new media record(s)")
+        if PILImage is not None:
+            _backfill_variants(db, workers=workers, batch_size=batch_size)
+    finally:
+        db.close()
+
+
+def _backfill_variants(db, workers: int, batch_size: int) -> None:
+    """Generate any missing variants of images whose variants are not recorded, and record them."""
+    paths = [
+        path for (path,) in db.query(MediaFile.path)
+        .filter(MediaFile.variants.is_(None), MediaFile.mime_type.like("image/%"))
+    ]
+    logging.info(f"Backfill: {len(paths)} image(s) need their variants recorded")
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(paths), batch_size):
+            batch = paths[start:start + batch_size]
+            futures = [executor.submit(generate_variants, path) for path in batch]
+            for path, future in zip(batch, futures):
+                try:
+                    record_variants(path, future.result())
+                except Exception as e:
+                    logging.error(f"Backfill: variants failed for {path}: {e}")
+            done += len(batch)
+            logging.info(f"Backfill: variants recorded for {done}/{len(paths)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill image metadata for existing uploads.")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    backfill(batch_size=args.batch_size, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import asyncio
+import os
+from collections import Counter
+from typing import Iterable, List, Optional, Union
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.uploads import save_upload
+from app.media.models.media import MediaFile
+from app.media.metadata import extract_metadata
+from app.media.storage import storage
+from app.media.variants import get_process_pool, queue_variants, remove_variants
+
+UPLOAD_BATCH_CONCURRENCY = int(os.environ.get("UPLOAD_BATCH_CONCURRENCY", 4))
+
+def normalize_path(path: Optional[str]) -> Optional[str]:
+    """Reduce absolute media URLs (BASE_URL + path) to the stored /static/... path."""
+    if not path:
+        return None
+    index = path.find("/static/")
+    return path[index:] if index > 0 else path
+
+async def store_upload(db: Session, upload: UploadFile, directory: str) -> str:
+    """
+    Save an upload by content hash, make sure it is tracked in media_files with
+    its metadata and queue generation of its resized variants. The returned
+    path starts with no references; callers add one with add_reference once
+    the row that points at it has been saved.
+    """
+    saved = await save_upload(upload, directory)
+    if not db.query(MediaFile.id).filter(MediaFile.path == saved.path).first():
+        metadata = await asyncio.get_running_loop().run_in_executor(
+            get_process_pool("metadata"), extract_metadata, storage.local_path(saved.path)
+        )
+        metadata["size"] = saved.size
+        db.add(MediaFile(path=saved.path, sha256=saved.sha256, ref_count=0, **metadata))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another request stored the same bytes concurrently.
+            db.rollback()
+    queue_variants(saved.path)
+    return saved.path
+
+async def _save_with_metadata(upload: UploadFile, directory: str):
+    saved = await save_upload(upload, directory)
+    metadata = await asyncio.get_running_loop().run_in_executor(
+        get_process_pool("metadata"), extract_metadata, storage.local_path(saved.path)
+    )
+    metadata["size"] = saved.size
+    return saved, metadata
+
+def _insert_media(db: Session, rows: List[dict]) -> None:
+    """Insert media records in one statement, falling back to one by one on a conflict."""
+    if not rows:
+        return
+    try:
+        db.bulk_insert_mappings(MediaFile, rows)
+        db.commit()
+    except IntegrityError:
+        # Another request stored some of the same bytes concurrently.
+        db.rollback()
+        for row in rows:
+            db.add(MediaFile(**row))
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+
+async def store_uploads(
+    db: Session,
+    uploads: List[UploadFile],
+    directory: str,
+    concurrency: int = UPLOAD_BATCH_CONCURRENCY,
+) -> List[Union[str, Exception]]:
+    """
+    store_upload for many files: at most `concurrency` uploads are streamed
+    and inspected at once, and new media records are inserted together.
+    Returns the stored path or the exception for each upload, in order, so
+    one bad file does not fail the others.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def store_one(upload: UploadFile):
+        async with semaphore:
+            return await _save_with_metadata(upload, directory)
+
+    results = await asyncio.gather(*(store_one(upload) for upload in uploads), return_exceptions=True)
+    stored = {
+        saved.path: {"path": saved.path, "sha256": saved.sha256, "ref_count": 0, **metadata}
+        for saved, metadata in (result for result in results if not isinstance(result, BaseException))
+    }
+    existing = {
+        path for (path,) in db.query(MediaFile.path).filter(MediaFile.path.in_(list(stored)))
+    } if stored else set()
+    _insert_media(db, [row for path, row in stored.items() if path not in existing])
+    for path in stored:
+        queue_variants(path)
+    return [result if isinstance(result, BaseException) else result[0].path for result in results]
+
+async def register_stored(db: Session, path: str, allowed_types: Optional[set] = None) -> str:
+    """
+    Track a file that was uploaded straight to storage through a presigned
+    form. Like store_upload, the path starts with no references.
+    """
+    if not db.query(MediaFile.id).filter(MediaFile.path == path).first():
+        if not await run_in_threadpool(storage.exists, path):
+            raise HTTPException(status_code=400, detail="Uploaded file not found in storage.")
+        local_path = await run_in_threadpool(storage.fetch, path)
+        metadata = await asyncio.get_running_loop().run_in_executor(
+            get_process_pool("metadata"), extract_metadata, local_path, True
+        )
+        if allowed_types and metadata["mime_type"] not in allowed_types:
+            await run_in_threadpool(storage.delete, path)
+            raise HTTPException(status_code=400, detail="Uploaded file is not an allowed image type.")
+        db.add(MediaFile(path=path, ref_count=0, **metadata))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+    queue_variants(path)
+    return path
+
+def add_reference(db: Session, path: Optional[str]) -> None:
+    path = normalize_path(path)
+    if not path:
+        return
+    db.query(MediaFile).filter(MediaFile.path == path).update(
+        {MediaFile.ref_count: MediaFile.ref_count + 1}, synchronize_session=False
+    )
+    db.commit()
+
+def add_references(db: Session, paths: Iterable[Optional[str]]) -> None:
+    """add_reference for many paths with one UPDATE per distinct count."""
+    counts = Counter(path for path in map(normalize_path, paths) if path)
+    by_count = {}
+    for path, count in counts.items():
+        by_count.setdefault(count, []).append(path)
+    for count, group in by_count.items():
+        db.query(MediaFile).filter(MediaFile.path.in_(group)).update(
+            {MediaFile.ref_count: MediaFile.ref_count + count}, synchronize_session=False
+        )
+    db.commit()
+
+def release_reference(db: Session, path: Optional[str]) -> bool:
+    """
+    Drop one reference to `path` and delete the file once nothing uses it.
+    Returns False when the path is not a tracked content-addressed upload.
+    """
+    path = normalize_path(path)
+    if not path:
+        return False
+    updated = db.query(MediaFile).filter(MediaFile.path == path, MediaFile.ref_count > 0).update(
+        {MediaFile.ref_count: MediaFile.ref_count - 1}, synchronize_session=False
+    )
+    db.commit()
+    media = db.query(MediaFile).filter(MediaFile.path == path).first()
+    if media is None:
+        return False
+    if updated and media.ref_count <= 0:
+        storage.delete(path)
+        remove_variants(path)
+    return True
+
+def swap_reference(db: Session, old_path: Optional[str], new_path: Optional[str]) -> None:
+    if normalize_path(old_path) == normalize_path(new_path):
+        return
+    add_reference(db, new_path)
+    release_reference(db, old_path)
@@ -0,0 +1,183 @@
+"""
+Delete uploaded files that no row references any more. Run from the project root:
+
+    python -m app.media.gc [--dry-run] [--grace-hours 24] [--batch-size 100] [--max-deletes-per-second 200]
+
+The same collection can run periodically inside the app by setting
+MEDIA_GC_INTERVAL_SECONDS.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import List, Set
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+from app.core.database import SessionLocal
+from app.media.models.media import MediaFile
+from app.media.references import referenced_paths
+from app.media.storage import storage
+
+load_dotenv()
+
+MEDIA_DIRECTORIES = ("static/uploads", "static/uploadedimages")
+MEDIA_GC_GRACE_SECONDS = int(os.environ.get("MEDIA_GC_GRACE_SECONDS", 24 * 3600))
+MEDIA_GC_BATCH_SIZE = int(os.environ.get("MEDIA_GC_BATCH_SIZE", 100))
+MEDIA_GC_MAX_DELETES_PER_SECOND = float(os.environ.get("MEDIA_GC_MAX_DELETES_PER_SECOND", 200))
+# 0 disables the in-app schedule; the command can still be run by hand or cron.
+MEDIA_GC_INTERVAL_SECONDS = int(os.environ.get("MEDIA_GC_INTERVAL_SECONDS", 0))
+
+VARIANT_SUFFIX = re.compile(r"_w\d+$")
+
+
+@dataclass
+class GCReport:
+    dry_run: bool
+    scanned: int = 0
+    kept: int = 0
+    too_new: int = 0
+    deleted: int = 0
+    deleted_bytes: int = 0
+    deleted_records: int = 0
+    errors: int = 0
+    sample: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        action = "would delete" if self.dry_run else "deleted"
+        return (
+            f"GC: scanned {self.scanned} file(s), kept {self.kept}, skipped {self.too_new} inside the grace period, "
+            f"{action} {self.deleted} file(s) ({self.deleted_bytes / 1024 / 1024:.1f} MiB) "
+            f"and {self.deleted_records} media record(s), {self.errors} error(s)"
+        )
+
+
+def _live_roots(db, referenced: Set[str]) -> Set[str]:
+    """
+    Extension-less paths whose original and variants must be kept: everything
+    referenced by a row plus media records that still count references.
+    """
+    live = set(referenced)
+    for (path,) in db.query(MediaFile.path).filter(MediaFile.ref_count > 0).yield_per(1000):
+        live.add(path)
+    return {os.path.splitext(path)[0] for path in live}
+
+
+def _is_live(path: str, live_roots: Set[str]) -> bool:
+    if path.endswith(".part"):
+        return False
+    root = os.path.splitext(path)[0]
+    return root in live_roots or VARIANT_SUFFIX.sub("", root) in live_roots
+
+
+class _Throttle:
+    """Caps the delete rate so a large collection does not saturate the disk."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1 / per_second if per_second > 0 else 0
+        self.next_at = time.monotonic()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self.next_at > now:
+            time.sleep(self.next_at - now)
+        self.next_at = max(now, self.next_at) + self.interval
+
+
+def collect(
+    dry_run: bool = False,
+    grace_seconds: int = MEDIA_GC_GRACE_SECONDS,
+    batch_size: int = MEDIA_GC_BATCH_SIZE,
+    max_deletes_per_second: float = MEDIA_GC_MAX_DELETES_PER_SECOND,
+    directories=MEDIA_DIRECTORIES,
+) -> GCReport:
+    """
+    Delete files under `directories` (in the configured storage backend, whose
+    listing is streamed page by page) that are neither referenced by any row
+    nor a variant of a referenced file, and drop the media records of deleted
+    files. Files modified within the grace period are kept, which protects
+    uploads whose row has not been committed yet.
+    """
+    report = GCReport(dry_run=dry_run)
+    cutoff = time.time() - grace_seconds
+    throttle = _Throttle(max_deletes_per_second)
+    db = SessionLocal()
+    try:
+        live_roots = _live_roots(db, set(referenced_paths(db)))
+        batch: List[str] = []
+
+        def flush() -> None:
+            if not batch:
+                return
+            if not dry_run:
+                report.deleted_records += db.query(MediaFile).filter(
+                    MediaFile.path.in_(batch), MediaFile.ref_count <= 0
+                ).delete(synchronize_session=False)
+                db.commit()
+            batch.clear()
+
+        for directory in directories:
+            for path, size, modified in storage.iter_files(directory):
+                report.scanned += 1
+                if _is_live(path, live_roots):
+                    report.kept += 1
+                    continue
+                if modified > cutoff:
+                    report.too_new += 1
+                    continue
+                if len(report.sample) < 20:
+                    report.sample.append(path)
+                if not dry_run:
+                    throttle.wait()
+                    try:
+                        storage.delete(path)
+                    except Exception as e:
+                        report.errors += 1
+                        logging.error(f"GC: could not delete {path}: {e}")
+                        continue
+                report.deleted += 1
+                report.deleted_bytes += size
+                batch.append(path)
+                if len(batch) >= batch_size:
+                    flush()
+        flush()
+    finally:
+        db.close()
+    logging.info(report.summary())
+    if dry_run and report.sample:
+        logging.info("GC: candidates include " + ", ".join(report.sample))
+    return report
+
+
+async def run_periodically(interval_seconds: int = MEDIA_GC_INTERVAL_SECONDS) -> None:
+    """Background task started from the app lifespan when an interval is configured."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(collect)
+        except Exception as e:
+            logging.error(f"GC: scheduled run failed: {e}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete uploaded files that nothing references.")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be deleted without deleting")
+    parser.add_argument("--grace-hours", type=float, default=MEDIA_GC_GRACE_SECONDS / 3600)
+    parser.add_argument("--batch-size", type=int, default=MEDIA_GC_BATCH_SIZE)
+    parser.add_argument("--max-deletes-per-second", type=float, default=MEDIA_GC_MAX_DELETES_PER_SECOND)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    collect(
+        dry_run=args.dry_run,
+        grace_seconds=int(args.grace_hours * 3600),
+        batch_size=args.batch_size,
+        max_deletes_per_second=args.max_deletes_per_second,
+    )
+
+
+if __name__ == "__main__":
+    main()
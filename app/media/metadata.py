@@ -0,0 +1,74 @@
+import base64
+import hashlib
+import io
+import logging
+import os
+from typing import Optional
+from app.media.variants import PILImage, ImageOps
+
+LQIP_SIZE = 16
+
+# (offset, signature, mime type) checked against the first bytes of a file.
+MAGIC_NUMBERS = (
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (8, b"WEBP", "image/webp"),
+    (4, b"ftypavif", "image/avif"),
+    (0, b"<svg", "image/svg+xml"),
+    (0, b"%PDF", "application/pdf"),
+)
+
+
+def sniff_mime_type(header: bytes) -> Optional[str]:
+    for offset, signature, mime_type in MAGIC_NUMBERS:
+        if header[offset:offset + len(signature)] == signature:
+            return mime_type
+    return None
+
+
+def extract_metadata(disk_path: str, with_hash: bool = False) -> dict:
+    """
+    Inspect a stored file: byte size, MIME type from magic bytes and, for
+    images Pillow can decode, dimensions, dominant colour and a tiny WebP data
+    URI placeholder (LQIP). Runs in a worker process.
+    """
+    with open(disk_path, "rb") as f:
+        header = f.read(32)
+    metadata = {
+        "size": os.path.getsize(disk_path),
+        "mime_type": sniff_mime_type(header),
+        "width": None,
+        "height": None,
+        "dominant_color": None,
+        "lqip": None,
+    }
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(disk_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        metadata["sha256"] = digest.hexdigest()
+
+    if PILImage is None or not (metadata["mime_type"] or "").startswith("image/"):
+        return metadata
+    try:
+        with PILImage.open(disk_path) as original:
+            # Dimensions of the upright image, read before draft mode lets the
+            # JPEG decoder downscale.
+            width, height = original.size
+            if original.getexif().get(0x0112) in (5, 6, 7, 8):
+                width, height = height, width
+            metadata["width"], metadata["height"] = width, height
+            original.draft("RGB", (LQIP_SIZE * 8, LQIP_SIZE * 8))
+            image = ImageOps.exif_transpose(original).convert("RGB")
+            red, green, blue = image.resize((1, 1), PILImage.BOX).getpixel((0, 0))
+            metadata["dominant_color"] = f"#{red:02x}{green:02x}{blue:02x}"
+            image.thumbnail((LQIP_SIZE, LQIP_SIZE))
+            buffer = io.BytesIO()
+            image.save(buffer, format="WEBP", quality=40)
+            metadata["lqip"] = "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode()
+    except Exception as e:
+        logging.warning(f"Metadata: could not decode {disk_path}: {e}")
+    return metadata
@@ -0,0 +1,20 @@
+from sqlalchemy import JSON, Column, Integer, String, Text, DateTime, func
+from app.core.base import Base
+
+class MediaFile(Base):
+    __tablename__ = "media_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String(255), unique=True, index=True, nullable=False)
+    sha256 = Column(String(64), index=True, nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    mime_type = Column(String(100), nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    dominant_color = Column(String(7), nullable=True)
+    lqip = Column(Text, nullable=True)
+    # Generated variant widths per format, e.g. {"webp": [320, 640]}; NULL until recorded.
+    variants = Column(JSON(none_as_null=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
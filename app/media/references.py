@@ -0,0 +1,32 @@
+from collections import Counter
+from sqlalchemy.orm import Session
+from app.blog.models.blog import Blog
+from app.casestudy.models.model import CaseStudy
+from app.images.model.images import Image
+from app.media.crud import normalize_path
+from app.services.models.mspservices import MSPService
+from app.whatwedo.models.info import Info
+
+# Every column that stores an uploaded file path.
+MEDIA_COLUMNS = (
+    Image.image,
+    Blog.image,
+    Blog.thumbnail,
+    CaseStudy.image,
+    MSPService.image,
+    Info.image,
+)
+
+
+def referenced_paths(db: Session, batch_size: int = 1000) -> Counter:
+    """
+    Number of rows pointing at each stored /static/... path, across all media
+    columns. Rows are streamed in batches so large tables are never loaded at once.
+    """
+    references = Counter()
+    for column in MEDIA_COLUMNS:
+        for (value,) in db.query(column).filter(column.isnot(None)).yield_per(batch_size):
+            path = normalize_path(value)
+            if path:
+                references[path] += 1
+    return references
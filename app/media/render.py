@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from app.media.variants import PILImage, ImageOps, get_process_pool
+
+load_dotenv()
+
+RENDER_CACHE_DIR = os.environ.get("RENDER_CACHE_DIR", "cache/render")
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("RENDER_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+MAX_RENDER_DIMENSION = int(os.environ.get("MAX_RENDER_DIMENSION", 4000))
+
+RENDER_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "jpg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+}
+
+
+def render_image(source: str, destination: str, width: Optional[int], height: Optional[int], fmt: str, quality: int) -> int:
+    """
+    Resize `source` to fit within width x height (either may be None) without
+    upscaling and save it as `fmt`. Runs in a worker process; returns the size
+    of the written file.
+    """
+    save_format, _ = RENDER_FORMATS[fmt]
+    with PILImage.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        box_width = width or image.width
+        box_height = height or image.height
+        scale = min(box_width / image.width, box_height / image.height, 1)
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        if size != image.size:
+            image = image.resize(size, PILImage.LANCZOS)
+        if save_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        tmp_path = f"{destination}.{os.getpid()}.part"
+        image.save(tmp_path, format=save_format, quality=quality)
+    os.replace(tmp_path, destination)
+    return os.path.getsize(destination)
+
+
+class RenderCache:
+    """
+    Size-bounded disk cache of rendered images with LRU eviction. Concurrent
+    requests for the same key share a single render.
+    """
+
+    def __init__(self, directory: str = RENDER_CACHE_DIR, max_bytes: int = RENDER_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                stat = entry.stat()
+                files.append((stat.st_atime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._loaded = True
+
+    def _hit(self, name: str) -> bool:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            path = os.path.join(self.directory, name)
+            if name not in self._entries:
+                # May have been rendered by another worker process.
+                if not os.path.exists(path):
+                    return False
+                size = os.path.getsize(path)
+                self._entries[name] = size
+                self.total_bytes += size
+                return True
+            if not os.path.exists(path):
+                self.total_bytes -= self._entries.pop(name)
+                return False
+            self._entries.move_to_end(name)
+            return True
+
+    def _add(self, name: str, size: int) -> None:
+        with self._lock:
+            self.total_bytes += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest, oldest_size = self._entries.popitem(last=False)
+                self.total_bytes -= oldest_size
+                try:
+                    os.remove(os.path.join(self.directory, oldest))
+                except FileNotFoundError:
+                    pass
+
+    async def _render(self, name: str, source: str, destination: str, width, height, fmt: str, quality: int) -> None:
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(
+            get_process_pool("render"), render_image, source, destination, width, height, fmt, quality
+        )
+        self._add(name, size)
+
+    def _finished(self, name: str, task: asyncio.Task) -> None:
+        self._pending.pop(name, None)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"Render: failed for {name}: {task.exception()}")
+
+    async def get(self, source_key: str, source: str, width: Optional[int], height: Optional[int], fmt: str, quality: int) -> str:
+        """
+        Return the path of the rendered file, rendering it if it is not cached.
+        The render runs as its own task, so a client disconnecting does not
+        cancel work other identical requests are waiting on.
+        """
+        params = f"{source_key}|{width}|{height}|{fmt}|{quality}"
+        name = f"{hashlib.sha256(params.encode()).hexdigest()}.{fmt}"
+        destination = os.path.join(self.directory, name)
+        if self._hit(name):
+            return destination
+
+        task = self._pending.get(name)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._render(name, source, destination, width, height, fmt, quality)
+            )
+            self._pending[name] = task
+            task.add_done_callback(lambda done: self._finished(name, done))
+        await asyncio.shield(task)
+        return destination
+
+
+render_cache = RenderCache()
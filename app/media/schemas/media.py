@@ -0,0 +1,12 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+
+class MediaMeta(BaseModel):
+    mime_type: Optional[str] = None
+    size: int
+    width: Optional[int] = None
+    height: Optional[int] = None
+    dominant_color: Optional[str] = None
+    lqip: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
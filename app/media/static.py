@@ -0,0 +1,44 @@
+import os
+import re
+from dotenv import load_dotenv
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+load_dotenv()
+
+# Cache lifetime for files whose name does not change with their content
+# (uploads stored before content addressing).
+MEDIA_CACHE_MAX_AGE = int(os.environ.get("MEDIA_CACHE_MAX_AGE", 3600))
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# <sha256>.<ext> originals and their <sha256>_w<width>.<ext> variants.
+CONTENT_HASHED_NAME = re.compile(r"^[0-9a-f]{64}(_w\d+)?\.[A-Za-z0-9]+$")
+
+
+def is_content_hashed(path: str) -> bool:
+    return bool(CONTENT_HASHED_NAME.match(os.path.basename(path)))
+
+
+class MediaFiles(StaticFiles):
+    """
+    StaticFiles for uploaded media. Responses are FileResponses, which answer
+    Range requests, derive ETag/Last-Modified from the stat result without
+    reading the file and hand the path to the server for zero-copy sending
+    when it supports the ASGI pathsend extension. Content-addressed files can
+    never change under the same URL, so they are marked immutable.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if is_content_hashed(str(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = f"public, max-age={MEDIA_CACHE_MAX_AGE}"
+        return response
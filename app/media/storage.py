@@ -0,0 +1,246 @@
+import os
+import threading
+from typing import Iterable, Iterator, Optional, Set, Tuple
+from dotenv import load_dotenv
+from app.media.static import IMMUTABLE_CACHE_CONTROL, is_content_hashed
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # boto3 is only needed for MEDIA_STORAGE=s3.
+    boto3 = None
+
+load_dotenv()
+
+# "local" keeps media on this node's disk; "s3" stores it in an S3-compatible
+# bucket (AWS, MinIO, ...). Credentials come from the usual AWS_* variables.
+MEDIA_STORAGE = os.environ.get("MEDIA_STORAGE", "local")
+MEDIA_BASE_URL = os.environ.get("MEDIA_BASE_URL", "https://l4it.net/api/")
+MEDIA_CACHE_DIR = os.environ.get("MEDIA_CACHE_DIR", "cache/media")
+MEDIA_S3_BUCKET = os.environ.get("MEDIA_S3_BUCKET", "")
+MEDIA_S3_ENDPOINT_URL = os.environ.get("MEDIA_S3_ENDPOINT_URL") or None
+MEDIA_S3_REGION = os.environ.get("MEDIA_S3_REGION") or None
+MEDIA_S3_PUBLIC_URL = os.environ.get("MEDIA_S3_PUBLIC_URL", "")
+MEDIA_S3_MAX_POOL_CONNECTIONS = int(os.environ.get("MEDIA_S3_MAX_POOL_CONNECTIONS", 32))
+MEDIA_S3_MULTIPART_CHUNK_SIZE = int(os.environ.get("MEDIA_S3_MULTIPART_CHUNK_SIZE", 8 * 1024 * 1024))
+MEDIA_PRESIGN_EXPIRES = int(os.environ.get("MEDIA_PRESIGN_EXPIRES", 900))
+
+
+class Storage:
+    """
+    Where uploaded media lives. Files are addressed by their stored path
+    (/static/uploads/ab/cd/<sha256>.jpg), which is also what the database
+    keeps. Every backend has a local directory tree under `local_root`:
+    uploads are staged there, image processing reads and writes there, and
+    publish() makes a local file durable and visible in the backend.
+    """
+
+    local_root: str
+
+    def local_path(self, path: str) -> str:
+        return os.path.join(self.local_root, path.lstrip("/"))
+
+    def publish(self, path: str, content_type: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    def fetch(self, path: str) -> str:
+        """Local file with the contents of `path`, downloading it if needed."""
+        raise NotImplementedError
+
+    def exists(self, path: str) -> bool:
+        raise NotImplementedError
+
+    def existing(self, paths: Iterable[str]) -> Set[str]:
+        """The subset of `paths` that exist."""
+        return {path for path in paths if self.exists(path)}
+
+    def delete(self, path: str) -> None:
+        raise NotImplementedError
+
+    def url(self, path: str) -> str:
+        raise NotImplementedError
+
+    def iter_files(self, prefix: str) -> Iterator[Tuple[str, int, float]]:
+        """(path, size, modified timestamp) of every file under `prefix`."""
+        raise NotImplementedError
+
+    def presigned_upload(self, path: str, content_type: str, max_bytes: int) -> Optional[dict]:
+        """Form target for a browser upload straight to the store, or None if unsupported."""
+        return None
+
+
+class LocalStorage(Storage):
+    """Files on this node's disk, served by the app's /static mounts."""
+
+    def __init__(self, root: str = "", base_url: str = MEDIA_BASE_URL):
+        self.local_root = root or os.getcwd()
+        self.base_url = base_url
+
+    def publish(self, path: str, content_type: Optional[str] = None) -> None:
+        pass
+
+    def fetch(self, path: str) -> str:
+        return self.local_path(path)
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(self.local_path(path))
+
+    def delete(self, path: str) -> None:
+        try:
+            os.remove(self.local_path(path))
+        except FileNotFoundError:
+            pass
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url.rstrip('/')}/{path.lstrip('/')}"
+
+    def _scan(self, directory: str):
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            return
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from self._scan(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+    def iter_files(self, prefix: str) -> Iterator[Tuple[str, int, float]]:
+        for entry in self._scan(self.local_path(prefix)):
+            stat = entry.stat(follow_symlinks=False)
+            relative = os.path.relpath(entry.path, self.local_root)
+            yield f"/{relative.replace(os.sep, '/')}", stat.st_size, stat.st_mtime
+
+
+class S3Storage(Storage):
+    """
+    An S3-compatible bucket. Object keys are stored paths without the leading
+    slash. One client with a connection pool is shared by all threads; large
+    files are sent as multipart uploads. local_root acts as a node-local cache
+    of originals and variants for image processing.
+    """
+
+    def __init__(
+        self,
+        bucket: str = MEDIA_S3_BUCKET,
+        endpoint_url: Optional[str] = MEDIA_S3_ENDPOINT_URL,
+        region: Optional[str] = MEDIA_S3_REGION,
+        public_url: str = MEDIA_S3_PUBLIC_URL,
+        cache_dir: str = MEDIA_CACHE_DIR,
+    ):
+        if boto3 is None:
+            raise RuntimeError("MEDIA_STORAGE=s3 requires boto3 to be installed.")
+        if not bucket:
+            raise RuntimeError("MEDIA_STORAGE=s3 requires MEDIA_S3_BUCKET.")
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.public_url = public_url or f"{(endpoint_url or 'https://s3.amazonaws.com').rstrip('/')}/{bucket}"
+        self.local_root = cache_dir
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MEDIA_S3_MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=MEDIA_S3_MULTIPART_CHUNK_SIZE,
+        )
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Created lazily so worker processes never inherit a client from the parent.
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = boto3.session.Session().client(
+                        "s3",
+                        endpoint_url=self.endpoint_url,
+                        region_name=self.region,
+                        config=BotoConfig(
+                            max_pool_connections=MEDIA_S3_MAX_POOL_CONNECTIONS,
+                            retries={"max_attempts": 5, "mode": "adaptive"},
+                        ),
+                    )
+        return self._client
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return path.lstrip("/")
+
+    def publish(self, path: str, content_type: Optional[str] = None) -> None:
+        extra_args = {"ContentType": content_type} if content_type else {}
+        if is_content_hashed(path):
+            extra_args["CacheControl"] = IMMUTABLE_CACHE_CONTROL
+        self.client.upload_file(
+            self.local_path(path), self.bucket, self._key(path),
+            ExtraArgs=extra_args, Config=self.transfer_config,
+        )
+
+    def fetch(self, path: str) -> str:
+        destination = self.local_path(path)
+        if not os.path.exists(destination):
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            tmp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.part"
+            self.client.download_file(self.bucket, self._key(path), tmp_path, Config=self.transfer_config)
+            os.replace(tmp_path, destination)
+        return destination
+
+    def exists(self, path: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(path))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def existing(self, paths: Iterable[str]) -> Set[str]:
+        # One listing under the paths' common prefix instead of a HEAD per path.
+        paths = set(paths)
+        if not paths:
+            return set()
+        prefix = os.path.commonprefix([self._key(path) for path in paths])
+        found = set()
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                if f"/{obj['Key']}" in paths:
+                    found.add(f"/{obj['Key']}")
+        return found
+
+    def delete(self, path: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(path))
+        try:
+            os.remove(self.local_path(path))
+        except FileNotFoundError:
+            pass
+
+    def url(self, path: str) -> str:
+        return f"{self.public_url.rstrip('/')}/{self._key(path)}"
+
+    def iter_files(self, prefix: str) -> Iterator[Tuple[str, int, float]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix).rstrip("/") + "/"):
+            for obj in page.get("Contents", []):
+                yield f"/{obj['Key']}", obj["Size"], obj["LastModified"].timestamp()
+
+    def presigned_upload(self, path: str, content_type: str, max_bytes: int) -> Optional[dict]:
+        return self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=self._key(path),
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_bytes]],
+            ExpiresIn=MEDIA_PRESIGN_EXPIRES,
+        )
+
+
+def create_storage(kind: str = MEDIA_STORAGE) -> Storage:
+    if kind == "local":
+        return LocalStorage()
+    if kind == "s3":
+        return S3Storage()
+    raise RuntimeError(f"Unknown MEDIA_STORAGE backend: {kind}")
+
+
+storage = create_storage()
@@ -0,0 +1,187 @@
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from app.core.cache import TTLCache
+from app.core.database import SessionLocal, offload
+from app.media.models.media import MediaFile
+from app.media.storage import storage
+
+try:
+    from PIL import Image as PILImage, ImageOps
+except ImportError:  # Pillow is optional; without it uploads are served as-is.
+    PILImage = None
+
+load_dotenv()
+
+VARIANT_WIDTHS = tuple(
+    int(width) for width in os.environ.get("IMAGE_VARIANT_WIDTHS", "320,640,1024,1600").split(",") if width.strip()
+)
+VARIANT_WORKERS = int(os.environ.get("IMAGE_VARIANT_WORKERS", 2))
+METADATA_WORKERS = int(os.environ.get("IMAGE_METADATA_WORKERS", 2))
+RENDER_WORKERS = int(os.environ.get("IMAGE_RENDER_WORKERS", 2))
+VARIANT_QUALITY = int(os.environ.get("IMAGE_VARIANT_QUALITY", 80))
+
+SAVE_FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG", ".gif": "GIF", ".webp": "WEBP"}
+
+# Image work runs in separate process pools, so an upload waiting for its
+# metadata or a request waiting for a render never queues behind background
+# variant generation.
+POOL_WORKERS = {"variants": VARIANT_WORKERS, "metadata": METADATA_WORKERS, "render": RENDER_WORKERS}
+_executors: Dict[str, ProcessPoolExecutor] = {}
+# Probed variants of originals whose variants are not recorded on their media
+# row yet, keyed by /static/... path. Short-lived because variants appear
+# asynchronously after upload.
+_srcset_cache = TTLCache(maxsize=4096, ttl=60)
+
+
+def variant_path(path: str, width: int, ext: str) -> str:
+    root, _ = os.path.splitext(path)
+    return f"{root}_w{width}{ext}"
+
+
+def _variant_exts(path: str):
+    ext = os.path.splitext(path)[1].lower()
+    return (".webp",) if ext == ".webp" else (".webp", ext)
+
+
+def _save(image, path: str, ext: str) -> None:
+    save_format = SAVE_FORMATS[ext]
+    if save_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    destination = storage.local_path(path)
+    # Two jobs for the same original (a re-upload of the same bytes) may overlap.
+    tmp_path = f"{destination}.{os.getpid()}.{threading.get_ident()}.part"
+    image.save(tmp_path, format=save_format, quality=VARIANT_QUALITY)
+    os.replace(tmp_path, destination)
+    storage.publish(path, f"image/{save_format.lower()}")
+
+
+def generate_variants(path: str) -> Dict[str, List[int]]:
+    """
+    Resize the original at `path` to each configured width narrower than it,
+    in WebP and in the original format, and publish them to storage. Runs in
+    a worker process. Existing variants are left alone. Returns the widths
+    available per format ("webp", "jpg", ...), to be recorded on the media row.
+    """
+    source = storage.fetch(path)
+    variants: Dict[str, List[int]] = {}
+    with PILImage.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        for width in VARIANT_WIDTHS:
+            if width >= image.width:
+                continue
+            height = max(1, round(image.height * width / image.width))
+            resized = None
+            for ext in _variant_exts(path):
+                if ext not in SAVE_FORMATS:
+                    continue
+                destination = variant_path(path, width, ext)
+                if not os.path.exists(storage.local_path(destination)):
+                    if resized is None:
+                        resized = image.resize((width, height), PILImage.LANCZOS)
+                    _save(resized, destination, ext)
+                variants.setdefault(ext.lstrip("."), []).append(width)
+    return variants
+
+
+def probe_variants(path: str) -> Dict[str, List[int]]:
+    """Widths per format of the variants of `path` that are in storage."""
+    candidates = {
+        variant_path(path, width, ext): (ext.lstrip("."), width)
+        for ext in _variant_exts(path)
+        for width in VARIANT_WIDTHS
+    }
+    variants: Dict[str, List[int]] = {}
+    for candidate in sorted(storage.existing(candidates), key=lambda c: candidates[c][1]):
+        fmt, width = candidates[candidate]
+        variants.setdefault(fmt, []).append(width)
+    return variants
+
+
+def record_variants(path: str, variants: Optional[Dict[str, List[int]]]) -> None:
+    """Store which variants of `path` exist on its media row (None means unknown)."""
+    db = SessionLocal()
+    try:
+        db.query(MediaFile).filter(MediaFile.path == path).update(
+            {MediaFile.variants: variants}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+    _srcset_cache.delete(path)
+
+
+def remove_variants(path: str) -> None:
+    """Delete every generated variant of `path` and forget them on its media row."""
+    for width in VARIANT_WIDTHS:
+        for ext in _variant_exts(path):
+            storage.delete(variant_path(path, width, ext))
+    record_variants(path, None)
+
+
+def get_process_pool(name: str) -> ProcessPoolExecutor:
+    """Process pool for one kind of image work: "variants", "metadata" or "render"."""
+    executor = _executors.get(name)
+    if executor is None:
+        executor = _executors[name] = ProcessPoolExecutor(max_workers=POOL_WORKERS[name])
+    return executor
+
+
+def _log_result(path: str):
+    def callback(future):
+        try:
+            variants = future.result()
+            logging.info(f"Variants: {path} has {sum(map(len, variants.values()))} file(s)")
+            record_variants(path, variants)
+        except Exception as e:
+            logging.error(f"Variants: failed for {path}: {e}")
+            _srcset_cache.delete(path)
+    return callback
+
+
+def queue_variants(path: Optional[str]) -> None:
+    """Schedule variant generation for an uploaded image without waiting for it."""
+    if PILImage is None or not path or not VARIANT_WIDTHS:
+        return
+    future = get_process_pool("variants").submit(generate_variants, path)
+    future.add_done_callback(_log_result(path))
+
+
+def shutdown_process_pools() -> None:
+    while _executors:
+        _, executor = _executors.popitem()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _srcset(path: str, variants: Dict[str, List[int]]) -> Optional[Dict[str, str]]:
+    srcset = {}
+    for ext in _variant_exts(path):
+        widths = variants.get(ext.lstrip("."))
+        if widths:
+            srcset[ext.lstrip(".")] = ", ".join(
+                f"{storage.url(variant_path(path, width, ext))} {width}w" for width in sorted(widths)
+            )
+    return srcset or None
+
+
+def variant_srcset(path: Optional[str], media=None) -> Optional[Dict[str, str]]:
+    """
+    Map of format ("webp", "jpg", ...) to a srcset string for the variants of
+    `path` that have been generated so far, or None if there are none yet.
+    `media` is the path's media_files row (or any object with `variants`);
+    once the variants are recorded there, storage is not touched. Otherwise,
+    while the job is pending or for files that predate the record, storage
+    is probed and the result cached briefly.
+    """
+    if not path:
+        return None
+    if media is not None and media.variants is not None:
+        return _srcset(path, media.variants)
+    variants = _srcset_cache.get(path)
+    if variants is None:
+        variants = offload(probe_variants, path)
+        _srcset_cache.set(path, variants)
+    return _srcset(path, variants)
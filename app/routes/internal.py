@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from app.auth.dependencies import get_admin_user
+from app.auth.principal import Principal, principal_cache
+from app.core.database import pool_stats
+from app.contact.ingest import contact_queue
+
+router = APIRouter()
+
+@router.get("/db-pool")
+def read_db_pool(current_user: Principal = Depends(get_admin_user)):
+    """Connection pool usage per engine: checked-out and overflow connections,
+    checkout wait-time histogram, timeouts and connection churn."""
+    return pool_stats()
+
+@router.get("/principal-cache")
+def read_principal_cache(current_user: Principal = Depends(get_admin_user)):
+    """Size and hit/miss counters of the authenticated-user cache."""
+    return principal_cache.stats()
+
+@router.get("/contact-queue")
+def read_contact_queue(current_user: Principal = Depends(get_admin_user)):
+    """Queued contact ingestion: queue depth, flush counts and flush latency."""
+    return contact_queue.stats()
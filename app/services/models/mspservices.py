@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, func, Index
+from sqlalchemy.orm import relationship
+from app.auth.models.user import User
 from app.core.base import Base
 class MSPService(Base):
     __tablename__ = "msp_services"
+    __table_args__ = (Index("ix_msp_services_created_at_id", "created_at", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -11,3 +14,5 @@ class MSPService(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    author = relationship(User)
@@ -1,7 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer, joinedload
+from app.core.pagination import keyset_page
 from .models.mspservices import MSPService
 from .schemas.mspservices import MSPServiceCreate, MSPServiceUpdate
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 def create_service(db: Session, service: MSPServiceCreate) -> MSPService:
     db_service = MSPService(**service.model_dump())
@@ -11,13 +12,16 @@ def create_service(db: Session, service: MSPServiceCreate) -> MSPService:
     return db_service
 
 def get_service(db: Session, service_id: int) -> Optional[MSPService]:
-    return db.query(MSPService).filter(MSPService.id == service_id).first()
+    return db.query(MSPService).options(joinedload(MSPService.author)).filter(MSPService.id == service_id).first()
 
 def get_services(db: Session, skip: int = 0, limit: int = 10) -> List[MSPService]:
-    return db.query(MSPService).offset(skip).limit(limit).all()
+    return db.query(MSPService).options(joinedload(MSPService.author), defer(MSPService.content)).offset(skip).limit(limit).all()
+
+def get_services_page(db: Session, cursor: Optional[str] = None, limit: int = 10) -> Tuple[List[MSPService], Optional[str]]:
+    return keyset_page(db.query(MSPService).options(joinedload(MSPService.author), defer(MSPService.content)), MSPService.created_at, MSPService.id, cursor, limit)
 
 def get_services_by_user(db: Session, user_id: int) -> List[MSPService]:
-    return db.query(MSPService).filter(MSPService.user_id == user_id).all()
+    return db.query(MSPService).options(joinedload(MSPService.author)).filter(MSPService.user_id == user_id).all()
 
 def update_service(db: Session, service_id: int, service: MSPServiceUpdate) -> Optional[MSPService]:
     db_service = db.query(MSPService).filter(MSPService.id == service_id).first()
@@ -1,34 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.core.database import SessionLocal
+from typing import List, Optional, Union
+from app.core.database import get_db, get_read_db, read_endpoint
+from app.core.conditional import conditional_response, table_signature
+from app.core.pagination import CursorPage
+from app.media.crud import store_upload, add_reference, release_reference, swap_reference
+from app.media.storage import storage
 from app.auth.dependencies import get_current_user
-from app.auth.models.user import User
+from app.auth.principal import Principal
 from ..models.mspservices import MSPService
-from ..schemas.mspservices import MSPServiceCreate, MSPServiceUpdate, MSPServiceOut
+from ..schemas.mspservices import MSPServiceCreate, MSPServiceUpdate, MSPServiceOut, MSPServiceSummary
 from ..mspcrud import (
     create_service,
     get_service,
     get_services,
+    get_services_page,
     update_service,
     delete_service,
     get_services_by_user,
 )
 import os
-import shutil
 
 router = APIRouter()
-BASE_URL = "https://l4it.net/api/"
 UPLOAD_DIR = "static/uploads"
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def to_service_out(service: MSPService, schema=MSPServiceOut):
+    service_dict = service.__dict__.copy()
+    service_dict["author_email"] = service.author.email if service.author else None
+    if service_dict.get("image"):
+        service_dict["image"] = storage.url(service_dict["image"])
+    return schema(**service_dict)
 
 @router.post("/", response_model=MSPServiceOut, status_code=status.HTTP_201_CREATED)
 async def create(
@@ -36,16 +39,13 @@ async def create(
     content: str = Form(...),
     image: Optional[UploadFile] = File(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     image_path = None
     if image:
         if image.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid image format.")
-        file_location = os.path.join(UPLOAD_DIR, image.filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        image_path = f"/{file_location.replace(os.sep, '/')}"
+        image_path = await store_upload(db, image, UPLOAD_DIR)
 
     service_data = MSPServiceCreate(
         name=name,  # Added name field
@@ -53,33 +53,46 @@ async def create(
         image=image_path,
         user_id=current_user.id
     )
-    return create_service(db, service_data)
+    created = create_service(db, service_data)
+    add_reference(db, created.image)
+    return created
 
 # services router file
 
-@router.get("/", response_model=List[MSPServiceOut])
-def read_services(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+@router.get("/", response_model=Union[List[MSPServiceSummary], CursorPage[MSPServiceSummary]])
+@read_endpoint
+def read_services(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    count, last_modified = table_signature(db, MSPService)
+    not_modified = conditional_response(request, response, (count, last_modified), last_modified)
+    if not_modified:
+        return not_modified
+    if cursor is not None:
+        services, next_cursor = get_services_page(db, cursor=cursor, limit=limit)
+        return CursorPage[MSPServiceSummary](items=[to_service_out(service, MSPServiceSummary) for service in services], next_cursor=next_cursor)
     services = get_services(db, skip, limit)
-    result = []
-    for service in services:
-        user = db.query(User).filter(User.id == service.user_id).first()
-        author_email = user.email if user else None
-        service_dict = service.__dict__.copy()
-        service_dict["author_email"] = author_email
-        if service_dict.get("image"):
-            service_dict["image"] = f"{BASE_URL}{service_dict['image']}"
-        result.append(MSPServiceOut(**service_dict))
-    return result
+    return [to_service_out(service, MSPServiceSummary) for service in services]
 
 @router.get("/{service_id}", response_model=MSPServiceOut)
-def read_service(service_id: int, db: Session = Depends(get_db)):
+@read_endpoint
+def read_service(service_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    updated_at = db.query(MSPService.updated_at).filter(MSPService.id == service_id).scalar()
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail="Service not found")
+    not_modified = conditional_response(request, response, (updated_at,), updated_at)
+    if not_modified:
+        return not_modified
     service = get_service(db, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
-    user = db.query(User).filter(User.id == service.user_id).first()
-    author_email = user.email if user else None
     service_dict = service.__dict__.copy()
-    service_dict["author_email"] = author_email
+    service_dict["author_email"] = service.author.email if service.author else None
     return MSPServiceOut(**service_dict)
 
 @router.patch("/{service_id}", response_model=MSPServiceOut)
@@ -90,7 +103,7 @@ async def update(
     image: Optional[UploadFile] = File(None),
     image_path: Optional[str] = Form(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     service = get_service(db, service_id)
     if not service:
@@ -98,14 +111,12 @@ async def update(
     if service.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized.")
 
+    old_image = service.image
     final_image_path = service.image
     if image:
         if image.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid image format.")
-        file_location = os.path.join(UPLOAD_DIR, image.filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        final_image_path = f"/{file_location.replace(os.sep, '/')}"
+        final_image_path = await store_upload(db, image, UPLOAD_DIR)
     elif image_path:
         final_image_path = image_path
 
@@ -115,20 +126,24 @@ async def update(
         image=final_image_path,
         user_id=current_user.id
     )
-    return update_service(db, service_id, updated_data)
+    updated = update_service(db, service_id, updated_data)
+    swap_reference(db, old_image, updated.image)
+    return updated
 
 @router.delete("/{service_id}", status_code=status.HTTP_200_OK)
-def delete(service_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def delete(service_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     service = get_service(db, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     if service.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized.")
+    old_image = service.image
     delete_service(db, service_id)
+    release_reference(db, old_image)
     return {"detail": "Service deleted successfully"}
 
 @router.get("/user/{user_id}", response_model=List[MSPServiceOut])
-def get_services_by_user_route(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_services_by_user_route(user_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     if user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized.")
     return get_services_by_user(db, user_id)
\ No newline at end of file
@@ -20,4 +20,15 @@ class MSPServiceOut(MSPServiceBase):
     created_at: datetime
     updated_at: datetime
     
+    model_config = ConfigDict(from_attributes=True)
+
+class MSPServiceSummary(BaseModel):
+    id: int
+    user_id: int
+    name: str
+    image: Optional[str] = None
+    author_email: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
     model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
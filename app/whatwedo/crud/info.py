@@ -1,7 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer, joinedload
+from app.core.pagination import keyset_page
 from ..models.info import Info
 from ..schemas.info import InfoCreate, InfoUpdate
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 def create_info(db: Session, info: InfoCreate) -> Info:
     db_info = Info(**info.model_dump())
@@ -11,13 +12,16 @@ def create_info(db: Session, info: InfoCreate) -> Info:
     return db_info
 
 def get_info(db: Session, info_id: int) -> Optional[Info]:
-    return db.query(Info).filter(Info.id == info_id).first()
+    return db.query(Info).options(joinedload(Info.author)).filter(Info.id == info_id).first()
 
 def get_infos(db: Session, skip: int = 0, limit: int = 10) -> List[Info]:
-    return db.query(Info).offset(skip).limit(limit).all()
+    return db.query(Info).options(joinedload(Info.author), defer(Info.content)).offset(skip).limit(limit).all()
+
+def get_infos_page(db: Session, cursor: Optional[str] = None, limit: int = 10) -> Tuple[List[Info], Optional[str]]:
+    return keyset_page(db.query(Info).options(joinedload(Info.author), defer(Info.content)), Info.created_at, Info.id, cursor, limit)
 
 def get_infos_by_user(db: Session, user_id: int) -> List[Info]:
-    return db.query(Info).filter(Info.user_id == user_id).all()
+    return db.query(Info).options(joinedload(Info.author)).filter(Info.user_id == user_id).all()
 
 def update_info(db: Session, info_id: int, info: InfoUpdate) -> Optional[Info]:
     db_info = db.query(Info).filter(Info.id == info_id).first()
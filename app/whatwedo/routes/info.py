@@ -1,34 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.core.database import SessionLocal
+from typing import List, Optional, Union
+from app.core.database import get_db, get_read_db, read_endpoint
+from app.core.conditional import conditional_response, table_signature
+from app.core.pagination import CursorPage
+from app.media.crud import store_upload, add_reference, release_reference, swap_reference
+from app.media.storage import storage
 from app.auth.dependencies import get_current_user
-from app.auth.models.user import User
+from app.auth.principal import Principal
 from ..models.info import Info
-from ..schemas.info import InfoCreate, InfoUpdate, InfoOut
+from ..schemas.info import InfoCreate, InfoUpdate, InfoOut, InfoSummary
 from ..crud.info import (
     create_info,
     get_info,
     get_infos,
+    get_infos_page,
     update_info,
     delete_info,
     get_infos_by_user,
 )
 import os
-import shutil
 
 router = APIRouter()
-BASE_URL = "https://l4it.net/api/"
 UPLOAD_DIR = "static/uploads"
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def to_info_out(info: Info, schema=InfoOut):
+    info_dict = info.__dict__.copy()
+    info_dict["author_email"] = info.author.email if info.author else None
+    if info_dict.get("image"):
+        info_dict["image"] = storage.url(info_dict["image"])
+    return schema(**info_dict)
 
 @router.post("/", response_model=InfoOut, status_code=status.HTTP_201_CREATED)
 async def create(
@@ -36,16 +39,13 @@ async def create(
     content: str = Form(...),
     image: Optional[UploadFile] = File(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     image_path = None
     if image:
         if image.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid image format.")
-        file_location = os.path.join(UPLOAD_DIR, image.filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        image_path = f"/{file_location.replace(os.sep, '/')}"
+        image_path = await store_upload(db, image, UPLOAD_DIR)
 
     info_data = InfoCreate(
         name=name,  # Added name field
@@ -53,40 +53,43 @@ async def create(
         image=image_path,
         user_id=current_user.id
     )
-    return create_info(db, info_data)
+    created = create_info(db, info_data)
+    add_reference(db, created.image)
+    return created
 
-@router.get("/", response_model=List[InfoOut])
-def read_infos(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+@router.get("/", response_model=Union[List[InfoSummary], CursorPage[InfoSummary]])
+@read_endpoint
+def read_infos(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    count, last_modified = table_signature(db, Info)
+    not_modified = conditional_response(request, response, (count, last_modified), last_modified)
+    if not_modified:
+        return not_modified
+    if cursor is not None:
+        infos, next_cursor = get_infos_page(db, cursor=cursor, limit=limit)
+        return CursorPage[InfoSummary](items=[to_info_out(info, InfoSummary) for info in infos], next_cursor=next_cursor)
     infos = get_infos(db, skip, limit)
-    result = []
-    for info in infos:
-        user = db.query(User).filter(User.id == info.user_id).first()
-        author_email = user.email if user else None
-        info_dict = info.__dict__.copy()
-        info_dict["author_email"] = author_email
-
-        if info_dict.get("image"):
-            info_dict["image"] = f"{BASE_URL}{info_dict['image']}"
-        
-        result.append(InfoOut(**info_dict))
-    return result
+    return [to_info_out(info, InfoSummary) for info in infos]
 
 @router.get("/{info_id}", response_model=InfoOut)
-def read_info(info_id: int, db: Session = Depends(get_db)):
+@read_endpoint
+def read_info(info_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    updated_at = db.query(Info.updated_at).filter(Info.id == info_id).scalar()
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail="Info not found")
+    not_modified = conditional_response(request, response, (updated_at,), updated_at)
+    if not_modified:
+        return not_modified
     info = get_info(db, info_id)
     if not info:
         raise HTTPException(status_code=404, detail="Info not found")
-    
-    user = db.query(User).filter(User.id == info.user_id).first()
-    author_email = user.email if user else None
-    info_dict = info.__dict__.copy()
-    info_dict["author_email"] = author_email
-
-    # Format image URL
-    if info_dict.get("image"):
-        info_dict["image"] = f"{BASE_URL}{info_dict['image']}"
-    
-    return InfoOut(**info_dict)
+    return to_info_out(info)
 
 @router.patch("/{info_id}", response_model=InfoOut)
 async def update(
@@ -96,7 +99,7 @@ async def update(
     image: Optional[UploadFile] = File(None),
     image_path: Optional[str] = Form(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     info = get_info(db, info_id)
     if not info:
@@ -104,14 +107,12 @@ async def update(
     if info.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized.")
 
+    old_image = info.image
     final_image_path = info.image
     if image:
         if image.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(status_code=400, detail="Invalid image format.")
-        file_location = os.path.join(UPLOAD_DIR, image.filename)
-        with open(file_location, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        final_image_path = f"/{file_location.replace(os.sep, '/')}"
+        final_image_path = await store_upload(db, image, UPLOAD_DIR)
     elif image_path:
         final_image_path = image_path
 
@@ -121,20 +122,24 @@ async def update(
         image=final_image_path,
         user_id=current_user.id
     )
-    return update_info(db, info_id, updated_data)
+    updated = update_info(db, info_id, updated_data)
+    swap_reference(db, old_image, updated.image)
+    return updated
 
 @router.delete("/{info_id}", status_code=status.HTTP_200_OK)
-def delete(info_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def delete(info_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     info = get_info(db, info_id)
     if not info:
         raise HTTPException(status_code=404, detail="Info not found")
     if info.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized.")
+    old_image = info.image
     delete_info(db, info_id)
+    release_reference(db, old_image)
     return {"detail": "Info deleted successfully"}
 
 @router.get("/user/{user_id}", response_model=List[InfoOut])
-def get_infos_by_user_route(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_infos_by_user_route(user_id: int, db: Session = Depends(get_db), current_user: Principal = Depends(get_current_user)):
     if user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized.")
     return get_infos_by_user(db, user_id)
\ No newline at end of file
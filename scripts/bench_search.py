@@ -0,0 +1,70 @@
+"""
+Build and query time of the in-memory BM25 index (app.core.search) on
+synthetic documents. Run from the project root:
+
+    python scripts/bench_search.py [--docs 10000 100000] [--queries 200]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.search import InvertedIndex
+
+WEIGHTS = {"heading": 3, "short_description": 2, "content": 1}
+
+
+def make_vocabulary(size: int, rng: random.Random):
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+def make_document(vocabulary, cum_weights, rng: random.Random) -> dict:
+    def words(n):
+        return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=n))
+    return {"heading": words(8), "short_description": words(30), "content": words(400)}
+
+
+def bench(doc_count: int, query_count: int, rng: random.Random, vocabulary, cum_weights) -> None:
+    documents = [make_document(vocabulary, cum_weights, rng) for _ in range(doc_count)]
+    index = InvertedIndex(WEIGHTS)
+    start = time.perf_counter()
+    for doc_id, fields in enumerate(documents, start=1):
+        index.add(doc_id, fields)
+    build_seconds = time.perf_counter() - start
+
+    queries = [" ".join(rng.sample(vocabulary[:5000], rng.randint(1, 3))) for _ in range(query_count)]
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, 10)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(
+        f"{doc_count:>7} docs: build {build_seconds:6.2f} s ({doc_count / build_seconds:8.0f} docs/s), "
+        f"{len(index.postings)} terms, query p50 {statistics.median(latencies):7.2f} ms, "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1]:7.2f} ms, max {latencies[-1]:7.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the BM25 search index.")
+    parser.add_argument("--docs", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(50000, rng)
+    # Zipf-distributed term frequencies: a few words are common, most are rare.
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    for doc_count in args.docs:
+        bench(doc_count, args.queries, rng, vocabulary, cum_weights)
+
+
+if __name__ == "__main__":
+    main()
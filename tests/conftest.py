@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at a throwaway SQLite
+# database and working directory before anything under app/ is imported.
+_workdir = tempfile.mkdtemp(prefix="l4it-tests-")
+os.chdir(_workdir)
+os.environ.setdefault("APP_HOST", "127.0.0.1")
+os.environ.setdefault("APP_PORT", "8000")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ["DB_MODE"] = "sync"
+os.environ["ADMIN_EMAILS"] = "admin@l4it.net"
+
+from concurrent.futures import Future
+import pytest
+from fastapi.testclient import TestClient
+from app.auth.auth import create_token_pair
+from app.auth.models.user import User
+from app.core.base import Base
+from app.core.database import SessionLocal, engine
+from app.main import app
+from app.media import variants
+
+
+@pytest.fixture
+def client():
+    Base.metadata.drop_all(bind=engine)
+    with TestClient(app) as test_client:
+        yield test_client
+        # Let queued image jobs and their callbacks finish before the next test resets the database.
+        while variants._executors:
+            _, executor = variants._executors.popitem()
+            executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """Create a user and return (user, Authorization headers, token pair)."""
+    def make(email: str = "user@l4it.net"):
+        user = User(email=email, hashed_password="not-used")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        tokens = create_token_pair(user.email)
+        return user, {"Authorization": f"Bearer {tokens['access_token']}"}, tokens
+    return make
+
+
+@pytest.fixture
+def finish_variants():
+    """Generate an upload's variants in-process and run the completion callback, as the pool would."""
+    def finish(path: str):
+        future = Future()
+        future.set_result(variants.generate_variants(path))
+        variants._log_result(path)(future)
+    return finish
@@ -0,0 +1,32 @@
+from app.auth import dependencies
+from app.auth.revocation import revocations
+from app.core.bloom import BloomFilter
+
+
+def _forget_local_revocations(monkeypatch):
+    # What a worker that has not synced yet knows about revoked tokens.
+    monkeypatch.setattr(revocations, "_bloom", BloomFilter(revocations.capacity, revocations.error_rate))
+
+
+def test_refresh_token_reuse_revokes_family(client, make_user, monkeypatch):
+    _, _, tokens = make_user()
+    first = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert first.status_code == 200
+
+    _forget_local_revocations(monkeypatch)
+    replay = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert replay.status_code == 401
+
+    _forget_local_revocations(monkeypatch)
+    rotated = client.post("/auth/refresh", json={"refresh_token": first.json()["refresh_token"]})
+    assert rotated.status_code == 401
+
+
+def test_internal_endpoints_require_an_admin(client, make_user, monkeypatch):
+    _, user_headers, _ = make_user("user@l4it.net")
+    _, admin_headers, _ = make_user("admin@l4it.net")
+    assert client.get("/internal/db-pool", headers=user_headers).status_code == 403
+    assert client.get("/internal/db-pool", headers=admin_headers).status_code == 200
+
+    monkeypatch.setattr(dependencies, "ADMIN_EMAILS", set())
+    assert client.get("/internal/db-pool", headers=admin_headers).status_code == 403
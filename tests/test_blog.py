@@ -0,0 +1,109 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image as PILImage
+from app.blog.models.blog import Blog
+from app.blog.routes.blog import blog_search
+from app.core.database import SessionLocal
+from app.media.storage import storage
+
+
+def test_blog_etag_changes_when_variants_appear(client, db, make_user, finish_variants):
+    user, _, _ = make_user()
+    path = "/static/uploads/ab/cd/abcd.jpg"
+    os.makedirs(os.path.dirname(storage.local_path(path)), exist_ok=True)
+    PILImage.new("RGB", (800, 600), "blue").save(storage.local_path(path), format="JPEG")
+    blog = Blog(
+        user_id=user.id, image=path, heading="Hello", short_description="Intro",
+        content="Body", type="news", slug="hello",
+    )
+    db.add(blog)
+    db.commit()
+
+    first = client.get(f"/blog/id/{blog.id}")
+    assert first.status_code == 200
+    assert first.json()["image_srcset"] is None
+
+    finish_variants(path)
+
+    second = client.get(f"/blog/id/{blog.id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert "320w" in second.json()["image_srcset"]["webp"]
+
+
+def test_concurrent_searches_share_one_rebuild(client, db, make_user):
+    user, _, _ = make_user()
+    db.add_all([
+        Blog(user_id=user.id, heading=f"Post {i}", short_description="Backup tips", content="Offsite backup",
+             type="news", slug=f"post-{i}")
+        for i in range(20)
+    ])
+    db.commit()
+    blog_search.ensure_fresh(db)
+    db.add(Blog(user_id=user.id, heading="Another", short_description="Backup", content="More backup",
+                type="news", slug="another"))
+    db.commit()
+
+    before = blog_search.rebuilds
+    barrier = threading.Barrier(8)
+
+    def search():
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            return len(blog_search.search(session, "backup", limit=50))
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: search(), range(8)))
+    assert blog_search.rebuilds == before + 1
+    assert results == [21] * 8
+
+
+def test_local_write_does_not_hide_another_workers_insert(client, db, make_user):
+    user, _, _ = make_user()
+    post = Blog(user_id=user.id, heading="Backups", short_description="Tips", content="Offsite",
+                type="news", slug="backups")
+    db.add(post)
+    db.commit()
+    blog_search.ensure_fresh(db)
+
+    # Another worker inserts a post; this index has not seen it.
+    other = SessionLocal()
+    try:
+        other.add(Blog(user_id=user.id, heading="Zebra", short_description="Stripes", content="Savanna",
+                       type="news", slug="zebra"))
+        other.commit()
+    finally:
+        other.close()
+
+    # This worker then updates a different post and indexes it incrementally.
+    post.content = "Offsite copies"
+    db.commit()
+    blog_search.index_row(db, post)
+
+    assert [row.slug for row, _, _ in blog_search.search(db, "zebra")] == ["zebra"]
+
+
+def test_local_write_keeps_a_fresh_index_fresh(client, db, make_user):
+    user, _, _ = make_user()
+    post = Blog(user_id=user.id, heading="Backups", short_description="Tips", content="Offsite",
+                type="news", slug="backups")
+    db.add(post)
+    db.commit()
+    blog_search.ensure_fresh(db)
+    before = blog_search.rebuilds
+
+    created = Blog(user_id=user.id, heading="Restores", short_description="Tips", content="Drills",
+                   type="news", slug="restores")
+    db.add(created)
+    db.commit()
+    blog_search.index_row(db, created)
+    db.delete(post)
+    db.commit()
+    blog_search.remove_row(db, post.id)
+
+    assert [row.slug for row, _, _ in blog_search.search(db, "tips")] == ["restores"]
+    assert blog_search.rebuilds == before
@@ -0,0 +1,190 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+import shutil
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+from app.contact.ingest import ContactIngestQueue
+from app.contact.models.models import ContactSubmission
+from app.contact.routes import routes as contact_routes
+from app.contact.schemas import schema
+from app.core.base import Base
+from app.core.database import engine
+from app.main import app
+
+SUBMISSION = {
+    "first_name": "Ada",
+    "last_name": "Lovelace",
+    "business_email": "ada@example.com",
+    "message": "Hello",
+    "services_needed": "Support",
+}
+
+
+def test_existing_table_gets_reference_column(make_user):
+    # contact_submissions as created before it had a reference column.
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE contact_submissions ("
+            "id INTEGER PRIMARY KEY, company_name VARCHAR(100), num_employees VARCHAR(50), "
+            "first_name VARCHAR(50) NOT NULL, last_name VARCHAR(50) NOT NULL, "
+            "business_email VARCHAR(100) NOT NULL, phone_number VARCHAR(20), referral_source VARCHAR(100), "
+            "message TEXT NOT NULL, services_needed VARCHAR(200) NOT NULL, submission_date DATETIME, "
+            "how_did_u_hear_us VARCHAR(200))"
+        ))
+        conn.execute(text(
+            "INSERT INTO contact_submissions (first_name, last_name, business_email, message, services_needed, "
+            "submission_date) VALUES ('Old', 'Lead', 'old@example.com', 'Hi', 'Audit', '2024-01-01 00:00:00')"
+        ))
+    with TestClient(app) as client:
+        _, headers, _ = make_user()
+        assert client.post("/contact/submit", json=SUBMISSION).status_code == 200
+        response = client.get("/contact/submissions", headers=headers)
+        assert response.status_code == 200
+        assert [s["first_name"] for s in response.json()] == ["Old", "Ada"]
+        assert response.json()[0]["reference"] is None
+    indexes = {index["name"] for index in inspect(engine).get_indexes("contact_submissions")}
+    assert {"ix_contact_submissions_reference", "ix_contact_submissions_submission_date_id"} <= indexes
+
+
+
+def queued(monkeypatch, tmp_path) -> ContactIngestQueue:
+    """Switch /contact/submit to queued mode with a fresh journal directory; the test flushes by hand."""
+    queue = ContactIngestQueue(directory=str(tmp_path), batch_size=10)
+    monkeypatch.setattr(contact_routes, "CONTACT_INGEST_MODE", "queued")
+    monkeypatch.setattr(contact_routes, "contact_queue", queue)
+    return queue
+
+
+def stored(db):
+    db.expire_all()
+    return db.query(ContactSubmission).order_by(ContactSubmission.id).all()
+
+
+def test_overlong_field_is_rejected_before_queueing(client, monkeypatch, tmp_path):
+    queue = queued(monkeypatch, tmp_path)
+    response = client.post("/contact/submit", json={**SUBMISSION, "first_name": "x" * 60})
+    assert response.status_code == 422
+    assert queue.stats()["queue_depth"] == 0
+
+
+def test_queued_submission_is_acknowledged_then_flushed(client, db, monkeypatch, tmp_path):
+    queue = queued(monkeypatch, tmp_path)
+    response = client.post("/contact/submit", json=SUBMISSION)
+    assert response.status_code == 202
+    reference = response.json()["reference"]
+    assert response.json()["status"] == "queued"
+    assert stored(db) == []
+
+    assert queue.flush() == 1
+    assert [s.reference for s in stored(db)] == [reference]
+    assert os.listdir(tmp_path) == []
+
+
+def test_rejected_row_is_dead_lettered_and_the_rest_flushed(client, db, tmp_path):
+    queue = ContactIngestQueue(directory=str(tmp_path), batch_size=10)
+    good = schema.ContactSubmissionCreate(**SUBMISSION)
+    # Bypasses validation, so the database rejects it (first_name is NOT NULL).
+    bad = schema.ContactSubmissionCreate.model_construct(**{**SUBMISSION, "first_name": None})
+    first = queue.enqueue(good)
+    rejected = queue.enqueue(bad)
+    last = queue.enqueue(good)
+
+    assert queue.flush() == 2
+    assert [s.reference for s in stored(db)] == [first["reference"], last["reference"]]
+    assert queue.stats()["queue_depth"] == 0
+    assert queue.stats()["dead_lettered"] == 1
+    with open(queue.dead_letter_path, encoding="utf-8") as f:
+        letters = [json.loads(line) for line in f]
+    assert [letter["reference"] for letter in letters] == [rejected["reference"]]
+    assert letters[0]["error"]
+
+    # Later submissions are no longer held up by the rejected one.
+    queue.enqueue(good)
+    assert queue.flush() == 1
+    assert len(stored(db)) == 3
+    assert sorted(os.listdir(tmp_path)) == ["dead-letter.jsonl"]
+
+
+def test_transient_failure_keeps_the_batch_queued(client, db, monkeypatch, tmp_path):
+    queue = ContactIngestQueue(directory=str(tmp_path), batch_size=10)
+    record = queue.enqueue(schema.ContactSubmissionCreate(**SUBMISSION))
+    insert = queue._insert
+
+    def unavailable(batch):
+        raise OperationalError("INSERT", {}, Exception("server has gone away"))
+    monkeypatch.setattr(queue, "_insert", unavailable)
+    assert queue.flush() == 0
+    assert queue.stats()["queue_depth"] == 1
+    assert not os.path.exists(queue.dead_letter_path)
+
+    monkeypatch.setattr(queue, "_insert", insert)
+    assert queue.flush() == 1
+    assert [s.reference for s in stored(db)] == [record["reference"]]
+
+
+def test_recovery_replays_journals_without_duplicates(client, db, tmp_path):
+    crashed = ContactIngestQueue(directory=str(tmp_path))
+    record = crashed.enqueue(schema.ContactSubmissionCreate(**SUBMISSION))
+    crashed._journal.close()
+    # A copy of the journal as if the process died after its insert had committed.
+    shutil.copy(crashed.journal_path, os.path.join(tmp_path, f"contact-{os.getpid()}-1.flushing"))
+
+    queue = ContactIngestQueue(directory=str(tmp_path))
+    assert queue.recover() == 2
+    assert queue.flush() == 2
+    assert [s.reference for s in stored(db)] == [record["reference"]]
+    assert os.listdir(tmp_path) == []
+
+
+def test_export_streams_the_requested_range_oldest_first(client, db, make_user):
+    _, headers, _ = make_user()
+    for day, name in ((3, "Carol"), (1, "Alice"), (2, "Bob"), (4, "Dave")):
+        db.add(ContactSubmission(**{**SUBMISSION, "first_name": name}, submission_date=datetime(2025, 1, day)))
+    db.commit()
+    params = {"since": "2025-01-02T00:00:00", "until": "2025-01-04T00:00:00"}
+
+    response = client.get("/contact/submissions/export", params={**params, "format": "csv"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="contact-submissions.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["first_name"] for row in rows] == ["Bob", "Carol"]
+    assert rows[0]["submission_date"] == "2025-01-02T00:00:00"
+
+    response = client.get("/contact/submissions/export", params={**params, "format": "ndjson"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["first_name"] for line in lines] == ["Bob", "Carol"]
+
+    response = client.get("/contact/submissions/export", params={"format": "ndjson"}, headers=headers)
+    assert [json.loads(line)["first_name"] for line in response.text.splitlines()] == ["Alice", "Bob", "Carol", "Dave"]
+
+
+def test_export_requires_a_token(client):
+    assert client.get("/contact/submissions/export").status_code == 401
+
+
+def test_cursor_pages_include_submissions_without_a_date(client, db, make_user):
+    _, headers, _ = make_user()
+    for day, name in ((1, "Alice"), (None, "Undated"), (2, "Bob"), (None, "Unknown")):
+        db.add(ContactSubmission(**{**SUBMISSION, "first_name": name}))
+        db.flush()
+        db.execute(text("UPDATE contact_submissions SET submission_date = :date WHERE first_name = :name"),
+                   {"date": datetime(2025, 1, day) if day else None, "name": name})
+    db.commit()
+
+    names, cursor = [], ""
+    for _ in range(6):
+        if cursor is None:
+            break
+        response = client.get("/contact/submissions", params={"cursor": cursor, "limit": 1}, headers=headers)
+        assert response.status_code == 200
+        names += [s["first_name"] for s in response.json()["items"]]
+        cursor = response.json()["next_cursor"]
+    assert names == ["Bob", "Alice", "Unknown", "Undated"]
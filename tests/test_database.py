@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.auth.principal import principal_cache
+from app.core.database import offload, read_endpoint
+from app.core.pool import pool_metrics
+
+
+def test_offload_keeps_blocking_work_off_the_event_loop():
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    @read_endpoint
+    def route(db):
+        offload(time.sleep, 0.3)
+        return threading.get_ident(), offload(threading.get_ident)
+
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        async with AsyncSession(engine) as session:
+            body_thread, work_thread = await route(db=session)
+        ticker.cancel()
+        await engine.dispose()
+        return body_thread, work_thread, ticks
+
+    body_thread, work_thread, ticks = asyncio.run(main())
+    assert work_thread != body_thread
+    # The loop kept serving other tasks while the body's blocking work ran.
+    assert ticks >= 10
+
+
+def test_authenticated_request_checks_out_one_connection(client, make_user):
+    _, headers, _ = make_user()
+    # Force get_current_user to query the users table as well as the route.
+    principal_cache.clear()
+    metrics = pool_metrics["sync"]
+    before = metrics.checkouts
+    response = client.get("/contact/submissions", headers=headers)
+    assert response.status_code == 200
+    assert metrics.checkouts - before == 1
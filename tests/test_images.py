@@ -0,0 +1,58 @@
+import io
+import time
+from PIL import Image as PILImage
+from app.media.models.media import MediaFile
+from app.media.storage import storage
+from app.media.variants import get_process_pool
+
+
+def _png(color, size=(8, 8)) -> bytes:
+    buffer = io.BytesIO()
+    PILImage.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_batch_upload_returns_created_images(client, make_user):
+    _, headers, _ = make_user()
+    response = client.post(
+        "/img/batch",
+        headers=headers,
+        files=[
+            ("images", ("red.png", _png("red"), "image/png")),
+            ("images", ("notes.txt", b"hello", "text/plain")),
+        ],
+    )
+    assert response.status_code == 200
+    created, rejected = response.json()
+    assert created["status"] == "created"
+    assert created["image"]["imagename"] == "red.png"
+    assert created["image"]["image"].endswith(".png")
+    assert rejected["status"] == "error"
+
+
+def test_upload_does_not_wait_for_variant_jobs(client, make_user):
+    _, headers, _ = make_user()
+    pool = get_process_pool("variants")
+    busy = [pool.submit(time.sleep, 2) for _ in range(4)]
+    start = time.monotonic()
+    response = client.post("/img/", headers=headers, files={"image": ("blue.png", _png("blue"), "image/png")})
+    assert response.status_code == 201
+    assert time.monotonic() - start < 1.5
+    for future in busy:
+        future.cancel()
+
+
+def test_srcset_comes_from_recorded_variants(client, db, make_user, finish_variants, monkeypatch):
+    _, headers, _ = make_user()
+    created = client.post("/img/", headers=headers, files={"image": ("wide.png", _png("green", (800, 400)), "image/png")})
+    image_id, path = created.json()["id"], created.json()["image"]
+    finish_variants(path)
+    assert db.query(MediaFile.variants).filter(MediaFile.path == path).scalar() == {"webp": [320, 640], "png": [320, 640]}
+
+    def no_storage(*args):
+        raise AssertionError("srcset lookups must not touch storage")
+    monkeypatch.setattr(storage, "exists", no_storage)
+    monkeypatch.setattr(storage, "existing", no_storage)
+    response = client.get(f"/img/id/{image_id}")
+    assert response.status_code == 200
+    assert "640w" in response.json()["srcset"]["webp"]
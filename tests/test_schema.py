@@ -0,0 +1,32 @@
+from sqlalchemy import inspect, text
+from app.core.base import Base
+from app.core.database import engine, init_db
+
+KEYSET_INDEXES = {
+    "blogs": "ix_blogs_created_at_id",
+    "case_studies": "ix_case_studies_created_at_id",
+    "contact_submissions": "ix_contact_submissions_submission_date_id",
+    "images": "ix_images_created_at_id",
+    "infos": "ix_infos_created_at_id",
+    "msp_services": "ix_msp_services_created_at_id",
+}
+
+
+def index_names(table: str) -> set:
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_existing_tables_get_keyset_indexes():
+    # Tables created before the cursor pagination indexes existed.
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name in KEYSET_INDEXES.values():
+            conn.execute(text(f"DROP INDEX {name}"))
+
+    init_db()
+
+    for table, name in KEYSET_INDEXES.items():
+        assert name in index_names(table)
+    # A second start finds nothing left to do.
+    init_db()